@@ -0,0 +1,205 @@
+import argparse
+import json
+import os
+import random
+import time
+import tracemalloc
+from maplist_generator.mapmode_pool import MapMode, MapModePool, MapPoolConfig, \
+	read_map_pool_from_file, read_tournament_from_file
+from maplist_generator.tournament_gen import CompiledTournament, generate_round
+
+"""Benchmarks the maplist generation pipeline.
+
+   Times filter_from_ctx, random_choice, generate_round and whole tournaments on
+   synthetic map pools and brackets, plus the example configs in this repo, and
+   reports games/sec and peak memory. Results can be saved as a JSON baseline and
+   compared against a later run.
+"""
+
+root_dir = os.path.dirname(os.path.realpath(__file__))
+example_dir = os.path.join(root_dir, "examples")
+smc_map_pool = os.path.join(root_dir, "smc", "smc_map_pool.json")
+ex_map_pool = os.path.join(example_dir, "example_map_pool.json")
+
+# Example tournaments that only work with the map pool they were written for
+fixture_map_pools = {
+	"counterpick_tournament.json": [smc_map_pool],
+	"example_tournament.json": [smc_map_pool],
+	"override_tournament.json": [smc_map_pool],
+}
+
+
+def make_synthetic_mapmode_list(num_modes, num_maps, seed=0):
+	rng = random.Random(seed)
+	return [MapMode(f"Mode {mode}", f"Map {map_num}", score=round(rng.uniform(3, 10), 1))
+		for mode in range(num_modes) for map_num in range(num_maps)]
+
+
+def make_double_elim_tournament(num_players):
+	return {
+		'tournament_type': 'double_elim',
+		'tournament_config': {
+			'num_players': num_players,
+			'round_config': {
+				'default': {'num_games': 3},
+				'w_finals': {'num_games': 5, 'map_quality': 'high'},
+				'l_finals': {'num_games': 5, 'map_quality': 'high'},
+				'grand_finals': {'num_games': 5, 'map_quality': 'very high'},
+			}
+		}
+	}
+
+
+def count_games(output_dict):
+	return sum(rd['num_games'] for rd in output_dict['rounds'])
+
+
+def measure(run, repeat, min_time=0.1):
+	"""Returns (best seconds per run, games per run, peak memory in KiB) for run().
+
+	   Each of the repeat samples calls run() as many times as fits in min_time, so
+	   fast benchmarks are not dominated by timer noise. Memory is measured on a
+	   separate run so tracemalloc does not slow down the timings.
+	"""
+	best = None
+	games = 0
+	for _ in range(repeat):
+		num_runs = 0
+		start = time.perf_counter()
+		elapsed = 0.0
+		while num_runs == 0 or elapsed < min_time:
+			games = run()
+			num_runs += 1
+			elapsed = time.perf_counter() - start
+		best = elapsed / num_runs if best is None else min(best, elapsed / num_runs)
+	tracemalloc.start()
+	run()
+	peak = tracemalloc.get_traced_memory()[1]
+	tracemalloc.stop()
+	return best, games, peak / 1024.0
+
+
+def bench_filter_from_ctx(mapmode_pool, num_games, seed):
+	rng = random.Random(seed)
+	picks = [rng.choice(mapmode_pool.mapmode_list) for _ in range(num_games)]
+	def run():
+		round_ctx = mapmode_pool.new_round_context()
+		for i in range(num_games):
+			mapmode_pool.filter_from_ctx(round_ctx)
+			round_ctx.append_game(picks[i])
+			if i % 5 == 4:
+				round_ctx.finalize_round()
+		return num_games
+	return run
+
+
+def bench_random_choice(mapmode_pool, num_games, seed):
+	rng = random.Random(seed)
+	filtered_pool = mapmode_pool.filter_exclude_bad_mapmodes()
+	def run():
+		for _ in range(num_games):
+			filtered_pool.random_choice(5, rng)
+		return num_games
+	return run
+
+
+def bench_generate_round(mapmode_pool, num_rounds, seed):
+	rng = random.Random(seed)
+	rd = {'num_games': 5}
+	def run():
+		round_ctx = mapmode_pool.new_round_context()
+		for _ in range(num_rounds):
+			generate_round(rd, mapmode_pool, round_ctx, rng)
+		return num_rounds * 5
+	return run
+
+
+def bench_tournament(mapmode_list, tournament_dict, seed):
+	compiled = CompiledTournament(mapmode_list, tournament_dict)
+	rng = random.Random(seed)
+	return lambda: count_games(compiled.generate(rng))
+
+
+def get_benchmarks(args):
+	mapmode_list = make_synthetic_mapmode_list(args.modes, args.maps, args.seed)
+	mapmode_pool = MapModePool(mapmode_list, MapPoolConfig())
+	pool_name = f"{args.modes}x{args.maps}"
+	benchmarks = [
+		(f"filter_from_ctx/{pool_name}", bench_filter_from_ctx(mapmode_pool, args.games, args.seed)),
+		(f"random_choice/{pool_name}", bench_random_choice(mapmode_pool, args.games, args.seed)),
+		(f"generate_round/{pool_name}", bench_generate_round(mapmode_pool, args.games // 5, args.seed)),
+	]
+	for num_players in args.players:
+		benchmarks.append((f"double_elim/{pool_name}/{num_players}p",
+			bench_tournament(mapmode_list, make_double_elim_tournament(num_players), args.seed)))
+
+	for file_name in sorted(os.listdir(example_dir)):
+		if not file_name.endswith("tournament.json"):
+			continue
+		tournament_dict = read_tournament_from_file(os.path.join(example_dir, file_name))
+		for map_pool_file in fixture_map_pools.get(file_name, [smc_map_pool, ex_map_pool]):
+			map_pool_name = os.path.basename(map_pool_file).replace(".json", "")
+			benchmarks.append((f"fixture/{file_name.replace('.json', '')}/{map_pool_name}",
+				bench_tournament(read_map_pool_from_file(map_pool_file), tournament_dict, args.seed)))
+	return benchmarks
+
+
+def run_benchmarks(args):
+	results = {}
+	for name, run in get_benchmarks(args):
+		if args.filter and args.filter not in name:
+			continue
+		seconds, games, peak_kib = measure(run, args.repeat, args.min_time)
+		results[name] = {
+			'seconds': seconds,
+			'games': games,
+			'games_per_sec': games / seconds if seconds > 0 else 0.0,
+			'peak_kib': peak_kib,
+		}
+	return results
+
+
+def print_results(results, baseline=None):
+	print(f"{'benchmark':<58} {'games/sec':>12} {'peak KiB':>10}" + (f" {'vs baseline':>12}" if baseline else ""))
+	for name, result in results.items():
+		line = f"{name:<58} {result['games_per_sec']:>12.0f} {result['peak_kib']:>10.1f}"
+		if baseline:
+			base = baseline.get(name)
+			if base and base['games_per_sec'] > 0:
+				line += f" {result['games_per_sec'] / base['games_per_sec']:>11.2f}x"
+			else:
+				line += f" {'new':>12}"
+		print(line)
+
+
+def main():
+	parser = argparse.ArgumentParser(description='Benchmark maplist generation on synthetic and example pools.')
+	parser.add_argument('--modes', type=int, default=5, help="Number of modes in the synthetic map pool. Default 5.")
+	parser.add_argument('--maps', type=int, default=200, help="Number of maps per mode in the synthetic map pool. Default 200.")
+	parser.add_argument('--games', type=int, default=2000, help="Games picked by the per-stage benchmarks. Default 2000.")
+	parser.add_argument('--players', type=int, nargs='+', default=[16, 128, 1024],
+		help="Bracket sizes for the double elimination benchmarks. Default 16 128 1024.")
+	parser.add_argument('--repeat', type=int, default=3, help="Runs per benchmark, the fastest is reported. Default 3.")
+	parser.add_argument('--min_time', type=float, default=0.1,
+		help="Minimum seconds per sample. Fast benchmarks are run several times per sample. Default 0.1.")
+	parser.add_argument('--seed', type=int, default=0, help="Seed for the synthetic pool and generation. Default 0.")
+	parser.add_argument('--filter', default=None, help="Only run benchmarks whose name contains this string.")
+	parser.add_argument('--save', default=None, help="Write the results as a JSON baseline to this file.")
+	parser.add_argument('--compare', default=None, help="Compare the results against a JSON baseline file.")
+	args = parser.parse_args()
+
+	baseline = None
+	if args.compare:
+		with open(args.compare) as f:
+			baseline = json.loads(f.read())['results']
+
+	results = run_benchmarks(args)
+	print_results(results, baseline)
+
+	if args.save:
+		with open(args.save, "w+") as f:
+			f.write(json.dumps({'args': vars(args), 'results': results}, indent=4))
+
+
+if __name__ == "__main__":
+	main()
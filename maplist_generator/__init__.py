@@ -0,0 +1,43 @@
+"""Maplist and tournament generation from scored map pools.
+
+   Submodules are only imported when one of their names is first used, so
+   importing the package is cheap. The command line entry point is
+   python -m maplist_generator, see cli.py.
+"""
+
+# public name -> submodule it lives in
+_exports = {
+	'MapMode': 'mapmode_pool',
+	'MapModePool': 'mapmode_pool',
+	'MapPoolConfig': 'mapmode_pool',
+	'RoundContext': 'mapmode_pool',
+	'to_mapmode_list': 'mapmode_pool',
+	'read_map_pool_from_file': 'mapmode_pool',
+	'read_tournament_from_file': 'mapmode_pool',
+	'CompiledTournament': 'tournament_gen',
+	'create_tournament': 'tournament_gen',
+	'generate_many': 'tournament_gen',
+	'create_continuous_maplist': 'maplist_gen',
+	'iter_continuous_maplist': 'maplist_gen',
+	'reroll_rounds': 'reroll',
+	'search_best_tournament': 'bracket_search',
+	'export_tournament': 'export',
+	'ResultCache': 'result_cache',
+	'HistoryStore': 'history_store',
+	'analyze_map_pool': 'analyze',
+	'get_round_distribution': 'analyze',
+	'GenerationTracer': 'tracing',
+	'trace_generation': 'tracing',
+}
+
+__all__ = list(_exports)
+
+
+def __getattr__(name):
+	module_name = _exports.get(name)
+	if module_name is None:
+		raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+	from importlib import import_module
+	value = getattr(import_module(f"{__name__}.{module_name}"), name)
+	globals()[name] = value
+	return value
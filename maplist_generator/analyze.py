@@ -0,0 +1,376 @@
+import os
+import random
+from collections import Counter, defaultdict, deque
+from .mapmode_pool import MapModePool, MapPoolConfig, read_map_pool_from_file, read_tournament_from_file
+from .tournament_gen import CompiledTournament, derive_bracket_seeds
+from .tracing import FallbackCounter, trace_generation
+
+"""Monte Carlo analysis of how often each mapmode actually gets picked.
+
+   Simulates many rounds through MapModePool.filter_from_ctx and random_choice,
+   the same steps tournament generation uses, and reports empirical per-mapmode
+   and per-mode frequencies, how often maps and mapmodes repeat, and how often
+   each constraint had to be skipped, for each map quality. Comparing a
+   mapmode's frequency to its share of the raw score weights shows how much the
+   constraints and recency penalty move it.
+
+   Rounds are simulated as a series of tournaments of tournament_rounds rounds
+   each, every one starting from an empty game history as generation does, so
+   tournament-wide rules like max_maps_per_mode act as they would in a real
+   tournament instead of for the whole simulation. Whole tournaments are
+   simulated in chunks of about CHUNK_ROUNDS rounds with seeds derived from the
+   analysis seed, so results only depend on the seed and number of games, not
+   on how many worker processes run the chunks.
+"""
+
+CHUNK_ROUNDS = 2000
+# Rounds per simulated tournament without a tournament config, about a 16 player double elimination bracket
+DEFAULT_TOURNAMENT_ROUNDS = 6
+# Rounds a mapmode counts as recently played for, the same window as the recency penalty
+RECENT_ROUNDS = 4
+# map_quality of the round config values "normal", "high" and "very high"
+DEFAULT_MAP_QUALITIES = [5, 7, 8]
+
+
+def simulate_rounds(mapmode_list, map_pool_config, num_rounds, games_per_round, map_quality, seed,
+	tournament_rounds=DEFAULT_TOURNAMENT_ROUNDS):
+	"""Simulates num_rounds rounds, with a new game history every tournament_rounds rounds,
+	   and returns raw counts, see merge_counts.
+	"""
+	rng = random.Random(seed)
+	mapmode_pool = MapModePool(mapmode_list, map_pool_config)
+	counter = FallbackCounter()
+	mapmode_counts = Counter()
+	recent_rounds = deque(maxlen=RECENT_ROUNDS)
+	map_repeats = 0
+	mapmode_repeats = 0
+	back_to_back_modes = 0
+	with trace_generation(counter):
+		for rd_num in range(num_rounds):
+			if rd_num % tournament_rounds == 0:
+				round_ctx = mapmode_pool.new_round_context()
+				previous_round_maps = set()
+				recent_rounds.clear()
+				last_mode = None
+			round_keys = set()
+			for _ in range(games_per_round):
+				chosen_mapmode = mapmode_pool.filter_from_ctx(round_ctx).random_choice(map_quality, rng)
+				key = chosen_mapmode.key
+				mapmode_counts[key] += 1
+				if chosen_mapmode.map_name in previous_round_maps:
+					map_repeats += 1
+				if any(key in rd for rd in recent_rounds):
+					mapmode_repeats += 1
+				if chosen_mapmode.mode_name == last_mode:
+					back_to_back_modes += 1
+				last_mode = chosen_mapmode.mode_name
+				round_keys.add(key)
+				round_ctx.append_game(chosen_mapmode)
+			previous_round_maps = set(round_ctx.current_round_maps)
+			recent_rounds.append(round_keys)
+			round_ctx.finalize_round()
+	return {
+		'num_games': counter.num_picks,
+		'mapmode_counts': mapmode_counts,
+		'fallbacks': Counter(counter.fallbacks),
+		'map_repeats': map_repeats,
+		'mapmode_repeats': mapmode_repeats,
+		'back_to_back_modes': back_to_back_modes,
+	}
+
+
+def merge_counts(chunk_counts):
+	merged = {'num_games': 0, 'mapmode_counts': Counter(), 'fallbacks': Counter(),
+		'map_repeats': 0, 'mapmode_repeats': 0, 'back_to_back_modes': 0}
+	for counts in chunk_counts:
+		for name, value in counts.items():
+			merged[name] += value
+	return merged
+
+
+def get_weight_shares(mapmode_list, map_pool_config, map_quality):
+	"""(mode, map) -> share of the total score weight of the mapmodes that are not excluded."""
+	pool = MapModePool(mapmode_list, map_pool_config).filter_exclude_bad_mapmodes()
+	weights = {pool.index.mapmode_list[i].key: pool.get_weight(i, map_quality) for i in pool.index.indices(pool.mask)}
+	total = sum(weights.values())
+	return {key: weight / total for key, weight in weights.items()} if total else {}
+
+
+def summarize(mapmode_list, map_pool_config, map_quality, counts):
+	num_games = counts['num_games'] or 1
+	scores = {mapmode.key: mapmode.score for mapmode in mapmode_list}
+	weight_shares = get_weight_shares(mapmode_list, map_pool_config, map_quality)
+	mode_counts = Counter()
+	for (mode_name, _), count in counts['mapmode_counts'].items():
+		mode_counts[mode_name] += count
+	mapmodes = []
+	for key in sorted(set(scores) | set(counts['mapmode_counts']), key=lambda key: -counts['mapmode_counts'][key]):
+		mapmodes.append({
+			'mode': key[0],
+			'map': key[1],
+			'score': scores.get(key),
+			'frequency': counts['mapmode_counts'][key] / num_games,
+			'weight_share': weight_shares.get(key, 0.0),
+		})
+	return {
+		'map_quality': map_quality,
+		'num_games': counts['num_games'],
+		'mapmodes': mapmodes,
+		'modes': {mode_name: count / num_games for mode_name, count in mode_counts.most_common()},
+		'repeat_rates': {
+			'map_in_previous_round': counts['map_repeats'] / num_games,
+			'mapmode_in_last_4_rounds': counts['mapmode_repeats'] / num_games,
+			'same_mode_as_previous_game': counts['back_to_back_modes'] / num_games,
+		},
+		'fallback_rates': {stage: count / num_games for stage, count in counts['fallbacks'].most_common()},
+	}
+
+
+def get_round_state_key(round_ctx, map_pool_config, games_left):
+	"""Everything filter_from_ctx reads from round_ctx that can change during a round.
+
+	   Two contexts that started the round from the same history and have the
+	   same key pick the remaining games_left games of the round with the same
+	   probabilities, whatever order their games so far were picked in. The maps
+	   a mode is limited to by max_maps_per_mode are only part of the key for
+	   modes that could reach the limit before the round ends.
+	"""
+	max_maps_per_mode = map_pool_config.max_maps_per_mode
+	limited_modes = sorted({mode_name for mode_name, _ in round_ctx.current_round_keys
+		if round_ctx.mode_game_counts[mode_name] + games_left > max_maps_per_mode})
+	return (
+		tuple(sorted(round_ctx.current_round_keys.items())),
+		tuple(round_ctx.get_recent_modes(map_pool_config.min_games_before_repeat_mode)),
+		tuple((mode_name, frozenset(round_ctx.get_used_mapmode_keys(mode_name, max_maps_per_mode)))
+			for mode_name in limited_modes),
+	)
+
+
+def get_round_distribution(mapmode_pool, round_ctx, num_games, map_quality=5, game_pools=None):
+	"""Exact pick probabilities for every game of the next round, without sampling.
+
+	   Propagates the distribution over contexts one game at a time, merging
+	   contexts with the same get_round_state_key. game_pools optionally gives
+	   the pool each game picks from, e.g. after a game override. The number of
+	   distinct states grows quickly with the length of the round, so this is
+	   meant for rounds of a few games.
+
+	   Returns (per_game, expected_games). per_game[i] maps each MapMode to the
+	   probability game i + 1 is on it, and expected_games maps each MapMode to
+	   the expected number of games of the round on it.
+	"""
+	config = mapmode_pool.map_pool_config
+	mapmodes_by_key = {}
+	states = {None: [1.0, round_ctx]}
+	per_game = []
+	for game in range(num_games):
+		pool = game_pools[game] if game_pools else mapmode_pool
+		# Summed by (mode, map), which hashes faster than MapMode
+		marginal = defaultdict(float)
+		next_states = {}
+		for state_prob, ctx in states.values():
+			for mapmode, prob in pool.get_next_pick_distribution(ctx, map_quality).items():
+				mapmodes_by_key[mapmode.key] = mapmode
+				marginal[mapmode.key] += state_prob * prob
+				if game == num_games - 1:
+					continue
+				next_ctx = ctx.clone()
+				next_ctx.append_game(mapmode)
+				key = get_round_state_key(next_ctx, config, num_games - game - 1)
+				if key in next_states:
+					next_states[key][0] += state_prob * prob
+				else:
+					next_states[key] = [state_prob * prob, next_ctx]
+		per_game.append({mapmodes_by_key[key]: prob for key, prob in marginal.items()})
+		states = next_states
+	expected_games = defaultdict(float)
+	for marginal in per_game:
+		for mapmode, prob in marginal.items():
+			expected_games[mapmode] += prob
+	return per_game, dict(expected_games)
+
+
+def get_exact_round_frequencies(mapmode_list, map_pool_config, games_per_round, map_quality):
+	"""Exact share of the games of a first round, with no earlier rounds, each mapmode is picked for.
+
+	   Sorted by frequency, as in summarize.
+	"""
+	mapmode_pool = MapModePool(mapmode_list, map_pool_config)
+	_, expected_games = get_round_distribution(mapmode_pool, mapmode_pool.new_round_context(), games_per_round, map_quality)
+	frequencies = [{'mode': mapmode.mode_name, 'map': mapmode.map_name, 'frequency': expected / games_per_round}
+		for mapmode, expected in expected_games.items()]
+	frequencies.sort(key=lambda entry: (-entry['frequency'], entry['mode'], entry['map']))
+	return frequencies
+
+
+# Set in each worker process by analyze_map_pool, so the map pool is sent once per worker
+_worker_state = None
+
+
+def _init_analyze_worker(mapmode_list, map_pool_config, games_per_round, tournament_rounds):
+	global _worker_state
+	_worker_state = (mapmode_list, map_pool_config, games_per_round, tournament_rounds)
+
+
+def _simulate_in_worker(job):
+	mapmode_list, map_pool_config, games_per_round, tournament_rounds = _worker_state
+	map_quality, num_rounds, seed = job
+	return simulate_rounds(mapmode_list, map_pool_config, num_rounds, games_per_round, map_quality, seed, tournament_rounds)
+
+
+def get_tournament_rounds(compiled):
+	"""Rounds in the longest game history of a compiled tournament, counting the
+	   rounds a forked history inherits.
+	"""
+	rounds_by_context = {}
+	for step in compiled.get_plan():
+		if 'same_as' in step:
+			continue
+		rounds_by_context[step['context']] = rounds_by_context.get(step['context'], 0) + 1
+		if step.get('fork'):
+			rounds_by_context[step['fork']] = rounds_by_context[step['context']]
+	return max(rounds_by_context.values(), default=1)
+
+
+def analyze_map_pool(mapmode_list, map_pool_config=None, num_games=100000, games_per_round=5,
+	map_qualities=DEFAULT_MAP_QUALITIES, seed=None, workers=1, tournament_rounds=DEFAULT_TOURNAMENT_ROUNDS):
+	"""Simulates about num_games games for each map quality and returns a summary per map quality.
+
+	   The game history starts over every tournament_rounds rounds.
+	   workers=None uses one process per core.
+	"""
+	map_pool_config = map_pool_config or MapPoolConfig()
+	num_rounds = max(1, -(-num_games // games_per_round))
+	# Whole tournaments per chunk, so no tournament is split between two chunks
+	chunk_rounds = max(1, CHUNK_ROUNDS // tournament_rounds) * tournament_rounds
+	chunk_sizes = [min(chunk_rounds, num_rounds - start) for start in range(0, num_rounds, chunk_rounds)]
+	chunk_seeds = derive_bracket_seeds(seed, len(chunk_sizes) * len(map_qualities))
+	jobs = [(map_quality, chunk_size, chunk_seeds[i * len(chunk_sizes) + j])
+		for i, map_quality in enumerate(map_qualities) for j, chunk_size in enumerate(chunk_sizes)]
+
+	if workers == 1 or len(jobs) == 1:
+		_init_analyze_worker(mapmode_list, map_pool_config, games_per_round, tournament_rounds)
+		chunk_counts = [_simulate_in_worker(job) for job in jobs]
+	else:
+		from concurrent.futures import ProcessPoolExecutor
+		workers = min(workers or os.cpu_count() or 1, len(jobs))
+		with ProcessPoolExecutor(max_workers=workers, initializer=_init_analyze_worker,
+			initargs=(mapmode_list, map_pool_config, games_per_round, tournament_rounds)) as executor:
+			chunk_counts = list(executor.map(_simulate_in_worker, jobs))
+
+	summaries = []
+	for i, map_quality in enumerate(map_qualities):
+		counts = merge_counts(chunk_counts[i * len(chunk_sizes):(i + 1) * len(chunk_sizes)])
+		summary = summarize(mapmode_list, map_pool_config, map_quality, counts)
+		summary['tournament_rounds'] = tournament_rounds
+		summaries.append(summary)
+	return summaries
+
+
+def format_summary(summary, top=None):
+	lines = [f"map_quality {summary['map_quality']}, {summary['num_games']} games "
+		f"in tournaments of {summary['tournament_rounds']} rounds", ""]
+	lines.append(f"{'mapmode':<48} {'score':>6} {'weight share':>13} {'frequency':>10} {'ratio':>7}")
+	for entry in summary['mapmodes'][:top]:
+		name = f"{entry['mode']} on {entry['map']}"
+		ratio = entry['frequency'] / entry['weight_share'] if entry['weight_share'] else 0.0
+		score = "" if entry['score'] is None else entry['score']
+		lines.append(f"{name:<48} {score:>6} {entry['weight_share']:>12.2%} {entry['frequency']:>9.2%} {ratio:>7.2f}")
+	lines.append("")
+	lines.append(f"{'mode':<48} {'frequency':>10}")
+	for mode_name, frequency in summary['modes'].items():
+		lines.append(f"{mode_name:<48} {frequency:>9.2%}")
+	lines.append("")
+	lines.append(f"{'repeat':<48} {'rate':>10}")
+	for name, rate in summary['repeat_rates'].items():
+		lines.append(f"{name:<48} {rate:>9.2%}")
+	lines.append("")
+	lines.append(f"{'constraint skipped':<48} {'rate':>10}")
+	for stage, rate in summary['fallback_rates'].items():
+		lines.append(f"{stage:<48} {rate:>9.2%}")
+	return "\n".join(lines)
+
+
+def format_exact_frequencies(map_quality, games_per_round, frequencies, top=None):
+	lines = [f"map_quality {map_quality}, exact frequencies in a first round of {games_per_round} games", ""]
+	lines.append(f"{'mapmode':<48} {'frequency':>10}")
+	for entry in frequencies[:top]:
+		name = f"{entry['mode']} on {entry['map']}"
+		lines.append(f"{name:<48} {entry['frequency']:>9.2%}")
+	return "\n".join(lines)
+
+
+def build_parser():
+	import argparse
+	parser = argparse.ArgumentParser(description='Simulate many games from a map pool and report how often each mapmode is picked.')
+	parser.add_argument('-m', '--map_pool_file', '--map_pool', required=True,
+		help="Map pool json file to analyze.")
+
+	parser.add_argument('-t', '--tournament_file', '--tournament', default=None,
+		help="Use the map generation settings of this tournament config. Defaults to the default settings.")
+
+	parser.add_argument('-g', '--num_games', '--games', type=int,
+		default=100000, help="Games to simulate per map quality. Default 100000.")
+
+	parser.add_argument('-r', '--games_per_round', type=int,
+		default=5, help="Games per simulated round. Default 5.")
+
+	parser.add_argument('--tournament_rounds', type=int, default=None,
+		help=f"Rounds per simulated tournament, after which the game history starts over. "
+			f"Defaults to the longest game history of TOURNAMENT_FILE, or {DEFAULT_TOURNAMENT_ROUNDS}.")
+
+	parser.add_argument('-q', '--map_qualities', '--quality', type=int, nargs='+',
+		default=DEFAULT_MAP_QUALITIES, help="Map qualities to simulate. Default 5 7 8 (normal, high, very high).")
+
+	parser.add_argument('-s', '--seed', type=int,
+		default=None, help="Seed for the simulation. Runs with the same seed and inputs give the same numbers.")
+
+	parser.add_argument('-w', '--workers', type=int,
+		default=0, help="Number of processes to simulate with. 0 uses one per CPU core. Default 0.")
+
+	parser.add_argument('--exact', action='store_true',
+		help="Also compute the exact frequencies within a single round with no earlier rounds, without sampling. Slow for rounds of more than about 5 games.")
+
+	parser.add_argument('--top', type=int,
+		default=None, help="Only list the TOP most frequent mapmodes.")
+
+	parser.add_argument('-o', '--output_file', '--output',
+		default=None, help="Also write the full results as JSON to this file.")
+	return parser
+
+
+def main(argv=None):
+	parsed_args = build_parser().parse_args(argv)
+
+	seed = parsed_args.seed if parsed_args.seed is not None else random.SystemRandom().getrandbits(32)
+	print(f"Using seed {seed}")
+	mapmode_list = read_map_pool_from_file(parsed_args.map_pool_file)
+	map_pool_config = None
+	tournament_rounds = DEFAULT_TOURNAMENT_ROUNDS
+	if parsed_args.tournament_file:
+		compiled = CompiledTournament(mapmode_list, read_tournament_from_file(parsed_args.tournament_file))
+		map_pool_config = compiled.map_pool_config
+		tournament_rounds = get_tournament_rounds(compiled)
+	if parsed_args.tournament_rounds:
+		tournament_rounds = parsed_args.tournament_rounds
+	print(f"Simulating tournaments of {tournament_rounds} rounds")
+
+	summaries = analyze_map_pool(mapmode_list, map_pool_config, parsed_args.num_games, parsed_args.games_per_round,
+		parsed_args.map_qualities, seed, parsed_args.workers or None, tournament_rounds)
+	print("\n\n".join(format_summary(summary, parsed_args.top) for summary in summaries))
+
+	if parsed_args.exact:
+		for summary in summaries:
+			summary['exact_round_frequencies'] = get_exact_round_frequencies(mapmode_list,
+				map_pool_config or MapPoolConfig(), parsed_args.games_per_round, summary['map_quality'])
+			print("\n" + format_exact_frequencies(summary['map_quality'], parsed_args.games_per_round,
+				summary['exact_round_frequencies'], parsed_args.top))
+
+	if parsed_args.output_file:
+		import json
+		with open(parsed_args.output_file, "w+") as f:
+			f.write(json.dumps({'seed': seed, 'results': summaries}, indent=4))
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,231 @@
+import glob
+import hashlib
+import os
+import random
+import sys
+import time
+from .mapmode_pool import read_map_pool_from_file, read_tournament_from_file
+from .tournament_gen import create_tournament
+
+"""Generates every combination of a set of tournament configs and map pools.
+
+   Jobs run in parallel worker processes. Each output is written to its own
+   JSON file, and a manifest in the output directory records the hash of every
+   job's inputs. A job whose tournament file, map pool file, seed and stage
+   format hash the same as in the manifest, and whose output still exists, is
+   skipped on the next run.
+"""
+
+MANIFEST_FILE = "manifest.json"
+MANIFEST_VERSION = 1
+
+
+def expand_globs(patterns):
+	"""Files matching any of patterns, sorted and without duplicates."""
+	paths = set()
+	for pattern in patterns:
+		matches = glob.glob(pattern, recursive=True)
+		if not matches:
+			raise RuntimeError(f'No files match {pattern}')
+		paths.update(os.path.normpath(path) for path in matches if os.path.isfile(path))
+	return sorted(paths)
+
+
+def get_file_stem(path):
+	return os.path.splitext(os.path.basename(path))[0]
+
+
+def get_file_names(paths):
+	"""path -> name used in job names. The file's stem, or for files sharing a stem, its path
+	   from the directory they have in common, e.g. a_weekly and b_weekly for a/weekly.json and b/weekly.json.
+	"""
+	paths_by_stem = {}
+	for path in paths:
+		paths_by_stem.setdefault(get_file_stem(path), []).append(path)
+	names = {}
+	for stem, stem_paths in paths_by_stem.items():
+		if len(stem_paths) == 1:
+			names[stem_paths[0]] = stem
+			continue
+		common_dir = os.path.commonpath([os.path.dirname(os.path.abspath(path)) for path in stem_paths])
+		for path in stem_paths:
+			relative_path = os.path.relpath(os.path.splitext(os.path.abspath(path))[0], common_dir)
+			names[path] = relative_path.replace(os.sep, "_")
+	return names
+
+
+def hash_file(path):
+	h = hashlib.sha256()
+	with open(path, "rb") as f:
+		for chunk in iter(lambda: f.read(1 << 16), b""):
+			h.update(chunk)
+	return h.hexdigest()
+
+
+def get_input_hash(tournament_hash, map_pool_hash, seed, stage_format):
+	key = f"{tournament_hash}:{map_pool_hash}:{seed}:{stage_format}"
+	return hashlib.sha256(key.encode("utf-8")).hexdigest()
+
+
+def get_jobs(tournament_files, map_pool_files, seed=None, stage_format='structured'):
+	"""One job per (tournament file, map pool file) pair, named after both files.
+
+	   Without a seed, each job's seed is derived from the hash of its input
+	   files, so unchanged inputs give the same output from run to run.
+	"""
+	file_hashes = {path: hash_file(path) for path in tournament_files + map_pool_files}
+	tournament_names = get_file_names(tournament_files)
+	map_pool_names = get_file_names(map_pool_files)
+	jobs = []
+	jobs_by_name = {}
+	for tournament_file in tournament_files:
+		for map_pool_file in map_pool_files:
+			name = f"{tournament_names[tournament_file]}__{map_pool_names[map_pool_file]}"
+			if name in jobs_by_name:
+				other = jobs_by_name[name]
+				raise RuntimeError(f'{tournament_file} with {map_pool_file} and {other["tournament_file"]} with '
+					f'{other["map_pool_file"]} would both be written to {name}.json, rename one of the files')
+			job_seed = seed
+			if job_seed is None:
+				job_seed = int(get_input_hash(file_hashes[tournament_file], file_hashes[map_pool_file], None, stage_format)[:8], 16)
+			jobs.append({
+				'name': name,
+				'tournament_file': tournament_file,
+				'map_pool_file': map_pool_file,
+				'seed': job_seed,
+				'stage_format': stage_format,
+				'input_hash': get_input_hash(file_hashes[tournament_file], file_hashes[map_pool_file], job_seed, stage_format),
+			})
+			jobs_by_name[name] = jobs[-1]
+	return jobs
+
+
+def read_manifest(output_dir):
+	import json
+	path = os.path.join(output_dir, MANIFEST_FILE)
+	if not os.path.exists(path):
+		return {}
+	with open(path, encoding="utf-8") as f:
+		manifest = json.load(f)
+	if manifest.get('version') != MANIFEST_VERSION:
+		return {}
+	return manifest.get('jobs', {})
+
+
+def write_json_atomic(path, data):
+	"""Writes data as JSON through a temporary file, so an interrupted run never leaves a partial file."""
+	import json
+	tmp_path = f"{path}.tmp"
+	with open(tmp_path, "w", encoding="utf-8") as f:
+		f.write(json.dumps(data, indent=4))
+	os.replace(tmp_path, path)
+
+
+def is_up_to_date(job, manifest, output_dir):
+	entry = manifest.get(job['name'])
+	return entry is not None and entry.get('status') == 'ok' \
+		and entry.get('input_hash') == job['input_hash'] \
+		and os.path.exists(os.path.join(output_dir, entry['output_file']))
+
+
+def run_job(job, output_dir):
+	"""Generates one job's tournament and writes it. Returns its manifest entry."""
+	start = time.perf_counter()
+	entry = {key: job[key] for key in ['tournament_file', 'map_pool_file', 'seed', 'stage_format', 'input_hash']}
+	entry['output_file'] = f"{job['name']}.json"
+	try:
+		output_dict = create_tournament(read_map_pool_from_file(job['map_pool_file']),
+			read_tournament_from_file(job['tournament_file']), random.Random(job['seed']), job['stage_format'])
+		write_json_atomic(os.path.join(output_dir, entry['output_file']), output_dict)
+		entry['status'] = 'ok'
+	except Exception as e:
+		# A broken config is recorded in the manifest instead of stopping the whole batch
+		entry['status'] = 'error'
+		entry['error'] = f"{type(e).__name__}: {e}"
+	entry['seconds'] = round(time.perf_counter() - start, 4)
+	return entry
+
+
+def run_batch(jobs, output_dir, workers=1, force=False):
+	"""Runs the jobs that are not up to date and updates the manifest.
+
+	   Returns (manifest entries of the jobs that ran, names of the skipped jobs).
+	   Entries for jobs not in this batch are kept in the manifest.
+	   workers=None uses one process per core.
+	"""
+	os.makedirs(output_dir, exist_ok=True)
+	manifest = read_manifest(output_dir)
+	to_run = []
+	skipped = []
+	for job in jobs:
+		if force or not is_up_to_date(job, manifest, output_dir):
+			to_run.append(job)
+		else:
+			skipped.append(job['name'])
+
+	if workers == 1 or len(to_run) <= 1:
+		entries = [run_job(job, output_dir) for job in to_run]
+	else:
+		from concurrent.futures import ProcessPoolExecutor
+		workers = min(workers or os.cpu_count() or 1, len(to_run))
+		with ProcessPoolExecutor(max_workers=workers) as executor:
+			entries = list(executor.map(run_job, to_run, [output_dir] * len(to_run)))
+
+	ran = {}
+	for job, entry in zip(to_run, entries):
+		manifest[job['name']] = entry
+		ran[job['name']] = entry
+	write_json_atomic(os.path.join(output_dir, MANIFEST_FILE),
+		{'version': MANIFEST_VERSION, 'jobs': dict(sorted(manifest.items()))})
+	return ran, skipped
+
+
+def build_parser():
+	import argparse
+	parser = argparse.ArgumentParser(description='Generate maplists for every combination of several tournament configs and map pools.')
+	parser.add_argument('-t', '--tournament_files', '--tournaments', nargs='+', required=True,
+		help="Tournament config files or glob patterns, e.g. 'events/*_tournament.json'. Quote patterns so the shell does not expand them.")
+
+	parser.add_argument('-m', '--map_pool_files', '--map_pools', nargs='+', required=True,
+		help="Map pool files or glob patterns. Every tournament is generated with every map pool.")
+
+	parser.add_argument('-o', '--output_dir', '--output',
+		default="output", help="Directory for the generated maplists and manifest.json. Default ./output.")
+
+	parser.add_argument('-s', '--seed', type=int,
+		default=None, help="Seed used for every job. By default each job's seed is derived from its input files, so unchanged inputs give the same maplist.")
+
+	parser.add_argument('-w', '--workers', type=int,
+		default=0, help="Number of processes to generate with. 0 uses one per CPU core. Default 0.")
+
+	parser.add_argument('-f', '--force', action='store_true',
+		help="Regenerate every job, even if its inputs have not changed since the last run.")
+
+	parser.add_argument('--legacy_stages', action='store_true',
+		help="Output each stage as a \"Mode on Map\" string instead of a structured record.")
+	return parser
+
+
+def main(argv=None):
+	parsed_args = build_parser().parse_args(argv)
+
+	tournament_files = expand_globs(parsed_args.tournament_files)
+	map_pool_files = expand_globs(parsed_args.map_pool_files)
+	stage_format = 'string' if parsed_args.legacy_stages else 'structured'
+	jobs = get_jobs(tournament_files, map_pool_files, parsed_args.seed, stage_format)
+
+	ran, skipped = run_batch(jobs, parsed_args.output_dir, parsed_args.workers or None, parsed_args.force)
+	for name, entry in ran.items():
+		if entry['status'] == 'ok':
+			print(f"Generated {entry['output_file']} with seed {entry['seed']} in {entry['seconds']:.3f}s")
+		else:
+			print(f"Failed {name}: {entry['error']}")
+	num_failed = sum(1 for entry in ran.values() if entry['status'] != 'ok')
+	print(f"{len(ran) - num_failed} generated, {len(skipped)} unchanged, {num_failed} failed. "
+		f"Manifest written to {os.path.join(parsed_args.output_dir, MANIFEST_FILE)}")
+	if num_failed:
+		sys.exit(1)
+
+
+if __name__ == "__main__":
+	main()
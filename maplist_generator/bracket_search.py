@@ -0,0 +1,137 @@
+import os
+import random
+from collections import defaultdict
+from .tournament_gen import CompiledTournament, derive_bracket_seeds, get_stage_key
+from .tracing import FallbackCounter, trace_generation
+
+"""Best-of-K search over generated tournaments.
+
+   Generates many candidate brackets from one config, scores each with a weighted
+   objective and keeps the best one. Candidates are identified by their seed, so
+   workers only send back (cost, seed) and the winner is regenerated at the end.
+"""
+
+# Weight of each objective term. Every term is a cost, lower is better.
+DEFAULT_OBJECTIVE_WEIGHTS = {
+	# Spread of games across modes, 0 when every mode is played equally often
+	'mode_balance': 1.0,
+	# Fraction of games on a map already played earlier in the bracket
+	'map_repetition': 1.0,
+	# How far the average mapmode score is below 10, from 0 to 1
+	'average_score': 1.0,
+	# Rules generation had to skip to have something to pick, per game
+	'constraint_violations': 5.0,
+}
+
+
+class BracketScorer:
+	"""Scores generated tournaments with a weighted sum of objective terms.
+
+	   Games are folded into running counters one at a time, so scoring a bracket
+	   is a single pass over its stages. Broken rules can't be told from the
+	   output alone, so they are counted while the bracket is generated, see
+	   score_candidate.
+	"""
+	def __init__(self, compiled, weights=None):
+		self.weights = dict(DEFAULT_OBJECTIVE_WEIGHTS)
+		self.weights.update(weights or {})
+		# Map pool scores, not the ones lowered by score factors
+		self.mapmodes_by_key = {mapmode.key: mapmode for mapmode in compiled.mapmode_pool.index.mapmode_list}
+
+	def get_terms(self, output_dict, num_fallbacks=0):
+		"""num_fallbacks is the number of rules the greedy engine skipped while generating
+		   output_dict. Rules the solver engine relaxed are read from the output.
+		"""
+		mode_counts = defaultdict(int)
+		map_counts = defaultdict(int)
+		num_games = 0
+		score_total = 0.0
+		repeated_maps = 0
+		violations = num_fallbacks
+		for rd in output_dict['rounds']:
+			violations += len(rd.get('relaxed_constraints', []))
+			for stage in rd['stages']:
+				key = get_stage_key(stage)
+				mapmode = self.mapmodes_by_key.get(key)
+				if mapmode is None:
+					# Counterpicks and stages not from this map pool
+					continue
+				num_games += 1
+				score_total += mapmode.score
+				if map_counts[mapmode.map_name] > 0:
+					repeated_maps += 1
+				map_counts[mapmode.map_name] += 1
+				mode_counts[mapmode.mode_name] += 1
+
+		if num_games == 0:
+			return {term: 0.0 for term in self.weights}
+		mean_mode_games = num_games / max(len(mode_counts), 1)
+		return {
+			'mode_balance': sum((count - mean_mode_games) ** 2 for count in mode_counts.values()) / num_games,
+			'map_repetition': repeated_maps / num_games,
+			'average_score': 1.0 - score_total / num_games / 10.0,
+			'constraint_violations': violations / num_games,
+		}
+
+	def get_cost(self, output_dict, num_fallbacks=0):
+		terms = self.get_terms(output_dict, num_fallbacks)
+		return sum(self.weights.get(term, 0.0) * value for term, value in terms.items())
+
+
+def score_candidate(compiled, scorer, seed):
+	"""Generates the candidate bracket of seed and returns its cost, counting
+	   every rule filter_from_ctx had to skip along the way.
+	"""
+	counter = FallbackCounter()
+	with trace_generation(counter):
+		output_dict = compiled.generate(random.Random(seed), 'mapmode')
+	return scorer.get_cost(output_dict, sum(counter.fallbacks.values()))
+
+
+# Set in each worker process by search_best_tournament
+_worker_state = None
+
+
+def _init_search_worker(compiled, scorer):
+	global _worker_state
+	_worker_state = (compiled, scorer)
+
+
+def _score_seeds(compiled, scorer, seeds):
+	best_cost, best_seed = None, None
+	for seed in seeds:
+		cost = score_candidate(compiled, scorer, seed)
+		if best_cost is None or cost < best_cost:
+			best_cost, best_seed = cost, seed
+	return best_cost, best_seed
+
+
+def _score_seeds_in_worker(seeds):
+	compiled, scorer = _worker_state
+	return _score_seeds(compiled, scorer, seeds)
+
+
+def search_best_tournament(mapmode_list, tournament_dict, k, seed=None, workers=1, weights=None, stage_format='structured',
+	score_factors=None):
+	"""Generates k candidate brackets and returns (output_dict, cost, bracket_seed) for the lowest cost one.
+
+	   weights overrides entries of DEFAULT_OBJECTIVE_WEIGHTS. The result only
+	   depends on seed and k, not on the number of workers. workers=None uses
+	   one process per core. score_factors is passed on to CompiledTournament.
+	"""
+	compiled = CompiledTournament(mapmode_list, tournament_dict, score_factors)
+	scorer = BracketScorer(compiled, weights)
+	bracket_seeds = derive_bracket_seeds(seed, k)
+	if workers == 1:
+		best_cost, best_seed = _score_seeds(compiled, scorer, bracket_seeds)
+	else:
+		from concurrent.futures import ProcessPoolExecutor
+		workers = workers or os.cpu_count() or 1
+		chunk_size = max(1, k // (4 * workers))
+		chunks = [bracket_seeds[i:i + chunk_size] for i in range(0, k, chunk_size)]
+		with ProcessPoolExecutor(max_workers=workers, initializer=_init_search_worker,
+			initargs=(compiled, scorer)) as executor:
+			results = list(executor.map(_score_seeds_in_worker, chunks))
+		# Ties go to the earliest candidate, same as the single process search
+		best_cost, best_seed = min(results, key=lambda result: result[0])
+	return compiled.generate(random.Random(best_seed), stage_format), best_cost, best_seed
@@ -0,0 +1,43 @@
+"""Single command line entry point: python -m maplist_generator <command> [args].
+
+   Each command is the main() of a submodule, which is only imported when its
+   command is run.
+"""
+
+import sys
+from importlib import import_module
+
+# command -> (submodule, description)
+COMMANDS = {
+	'tournament': ('tournament_gen', 'Create a maplist from a tournament configuration and map pool.'),
+	'maplist': ('maplist_gen', 'Create a continuous map list from a map pool.'),
+	'csv': ('csv_gen', 'Convert tournament output to EGTV CSV files and a Discord message.'),
+	'ipl': ('ipl_gen', 'Convert tournament output to IPL overlay JSON and a Discord message.'),
+	'batch': ('batch', 'Generate every combination of several tournament configs and map pools, skipping unchanged ones.'),
+	'history': ('history_store', 'Record and inspect the map history of event series.'),
+	'analyze': ('analyze', 'Simulate many games from a map pool and report how often each mapmode is picked.'),
+	'reroll': ('reroll', 'Regenerate some rounds of a tournament maplist, keeping the others.'),
+	'export': ('export', 'Export tournament output as IPL JSON, EGTV CSV and Discord messages in one pass.'),
+	'serve': ('server', 'Serve maplist generation over HTTP JSON-RPC.'),
+}
+
+
+def print_usage():
+	print("usage: python -m maplist_generator <command> [args]\n")
+	print("commands:")
+	for command, (_, description) in COMMANDS.items():
+		print(f"  {command:<12} {description}")
+	print("\nUse python -m maplist_generator <command> -h for help with a command.")
+
+
+def main(argv=None):
+	argv = sys.argv[1:] if argv is None else argv
+	if not argv or argv[0] in ('-h', '--help'):
+		print_usage()
+		return
+	if argv[0] not in COMMANDS:
+		print(f"Unknown command {argv[0]}\n")
+		print_usage()
+		sys.exit(2)
+	module = import_module(f"{__package__}.{COMMANDS[argv[0]][0]}")
+	return module.main(argv[1:])
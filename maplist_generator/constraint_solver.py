@@ -0,0 +1,254 @@
+import time
+
+"""Backtracking alternative to the greedy per-game picks of MapModePool.filter_from_ctx.
+
+   The greedy generator silently skips any rule that would leave no mapmodes for
+   the next game. RoundSolver instead plans all games of a round together, treating
+   the MapPoolConfig rules as hard constraints and backtracking out of dead ends.
+   Only when no plan exists are rules relaxed, in RELAXATION_ORDER, and the
+   relaxed rules are reported back. Once the time budget runs out, games are
+   picked one at a time like the greedy generator does.
+"""
+
+# Rules the solver may give up, least important first. Relaxing is cumulative,
+# so the nth attempt ignores the first n - 1 rules. Rules the plan found that
+# way doesn't need are then given back one at a time.
+RELAXATION_ORDER = [
+	'max_non_preferred_maps_per_round',
+	'max_maps_per_mode',
+	'distinct_maps_in_consecutive_rounds',
+	'min_games_before_repeat_mode',
+	'distinct_maps_in_round',
+]
+
+
+class SolverTimeout(Exception):
+	pass
+
+
+class SolverTables:
+	"""Compatibility masks for every mapmode of a pool, built once and shared by all solvers.
+
+	   same_map[i] and same_mode[i] are the masks of mapmodes sharing a map or mode
+	   with mapmode i, and okay[i] is whether it counts as a non-preferred map.
+	"""
+	def __init__(self, mapmode_pool):
+		index = mapmode_pool.index
+		self.index = index
+		self.same_map = [index.map_mask(mapmode.map_name) for mapmode in index.mapmode_list]
+		self.same_mode = [index.mode_mask(mapmode.mode_name) for mapmode in index.mapmode_list]
+		self.okay = [bool(index.okay_mask >> i & 1) for i in range(len(index.mapmode_list))]
+
+
+class RoundSolver:
+	"""Plans rounds with backtracking search for a single tournament.
+
+	   time_budget (seconds) is shared by every round planned with this solver.
+	   Once it is spent, the games of each remaining round are picked one at a
+	   time without backtracking, relaxing rules only for a game that would
+	   otherwise have nothing left to pick from.
+	"""
+	def __init__(self, tables, map_pool_config, time_budget=1.0):
+		self.tables = tables
+		self.config = map_pool_config
+		self.deadline = time.monotonic() + time_budget
+		# [(round list as returned by generate_round, [relaxed rule names])]
+		self.relaxations = []
+
+	def plan_round(self, mapmode_pool, round_ctx, game_masks, map_quality, rng):
+		"""Chooses one mapmode per entry of game_masks, the allowed mapmodes of each game.
+
+		   Returns (mapmodes, relaxed rule names). Nothing is appended to round_ctx.
+		"""
+		index = self.tables.index
+		scores = mapmode_pool.get_adjusted_scores(mapmode_pool.mask, round_ctx)
+		weights = {}
+		for mask in set(game_masks):
+			for i in index.indices(mask & index.not_bad_mask):
+				weights[i] = mapmode_pool.get_weight(i, map_quality, scores)
+
+		search = _RoundSearch(self, round_ctx, game_masks, weights, rng, self.deadline)
+		best = None
+		try:
+			for num_relaxed in range(len(RELAXATION_ORDER) + 1):
+				relaxed = set(RELAXATION_ORDER[:num_relaxed])
+				search.relaxed = relaxed
+				# With every rule relaxed the games don't depend on each other, so there's nothing to time out
+				search.deadline = self.deadline if num_relaxed < len(RELAXATION_ORDER) else None
+				best = search.solve()
+				if best is not None:
+					break
+			else:
+				raise RuntimeError('No mapmodes match the game overrides of this round')
+			# Only the last rule relaxed is known to be needed, so give back the earlier ones the round can do without
+			search.deadline = self.deadline
+			for rule in RELAXATION_ORDER[:max(num_relaxed - 1, 0)]:
+				search.relaxed = relaxed - {rule}
+				chosen = search.solve()
+				if chosen is not None:
+					best, relaxed = chosen, search.relaxed
+		except SolverTimeout:
+			if best is None:
+				chosen, relaxed_rules = search.pick_greedily()
+				return [index.mapmode_list[i] for i in chosen], relaxed_rules
+		relaxed = search.get_broken_rules(best, relaxed)
+		return [index.mapmode_list[i] for i in best], [rule for rule in RELAXATION_ORDER if rule in relaxed]
+
+	def record_round(self, round_list, relaxed):
+		if relaxed:
+			self.relaxations.append((round_list, relaxed))
+
+	def get_relaxed_constraints(self, round_list):
+		for recorded_list, relaxed in self.relaxations:
+			if recorded_list is round_list:
+				return relaxed
+		return []
+
+
+class _RoundSearch:
+	"""Depth-first search over the games of one round with one step of forward checking."""
+	def __init__(self, solver, round_ctx, game_masks, weights, rng, deadline):
+		self.tables = solver.tables
+		self.config = solver.config
+		self.round_ctx = round_ctx
+		self.game_masks = game_masks
+		# Names of the rules solve() ignores
+		self.relaxed = set()
+		self.weights = weights
+		self.rng = rng
+		self.deadline = deadline
+		index = self.tables.index
+		config = self.config
+
+		# Everything that only depends on the context is folded into masks up front
+		self.ctx_round_map_mask = 0
+		for map_name in round_ctx.current_round_maps:
+			self.ctx_round_map_mask |= index.map_mask(map_name)
+		self.ctx_previous_map_mask = 0
+		if config.distinct_maps_in_consecutive_rounds:
+			for map_name in round_ctx.previous_round_maps:
+				self.ctx_previous_map_mask |= index.map_mask(map_name)
+		self.ctx_recent_modes = round_ctx.get_recent_modes(config.min_games_before_repeat_mode)
+		self.ctx_okay_count = 0
+		for key, times_played in round_ctx.current_round_keys.items():
+			if index.key_masks.get(key, 0) & index.okay_mask:
+				self.ctx_okay_count += times_played
+		self.ctx_used_masks = {}
+		for mode in round_ctx.mode_game_counts:
+			used_mask = 0
+			for key in round_ctx.get_used_mapmode_keys(mode, config.max_maps_per_mode):
+				used_mask |= index.key_masks.get(key, 0)
+			self.ctx_used_masks[mode] = used_mask
+
+	def solve(self):
+		chosen = []
+		return chosen if self._solve(chosen) else None
+
+	def pick_greedily(self):
+		"""One weighted pick per game without backtracking. A game with nothing left
+		   relaxes rules in RELAXATION_ORDER until it has something to pick from,
+		   then keeps only the relaxed rules it still needs.
+
+		   Returns (chosen indices, names of the rules relaxed for any game).
+		"""
+		chosen = []
+		relaxed = set()
+		for _ in self.game_masks:
+			game_relaxed = set()
+			for rule in RELAXATION_ORDER:
+				if self._domain(chosen, game_relaxed):
+					break
+				game_relaxed.add(rule)
+			for rule in RELAXATION_ORDER:
+				if rule in game_relaxed and self._domain(chosen, game_relaxed - {rule}):
+					game_relaxed.discard(rule)
+			mask = self._domain(chosen, game_relaxed)
+			if not mask:
+				raise RuntimeError('No mapmodes match the game overrides of this round')
+			chosen.append(self._weighted_order(mask)[0])
+			relaxed |= game_relaxed
+		return chosen, [rule for rule in RELAXATION_ORDER if rule in relaxed]
+
+	def get_broken_rules(self, chosen, relaxed):
+		"""The rules of relaxed that the games in chosen break, so that a plan the
+		   time budget ran out on doesn't report rules it happens to meet.
+		"""
+		broken = set(relaxed)
+		for rule in RELAXATION_ORDER:
+			if rule in broken and self._meets(chosen, broken - {rule}):
+				broken.discard(rule)
+		return broken
+
+	def _meets(self, chosen, relaxed):
+		return all(self._domain(chosen[:game_num], relaxed) >> i & 1 for game_num, i in enumerate(chosen))
+
+	def _solve(self, chosen):
+		game_num = len(chosen)
+		if game_num == len(self.game_masks):
+			return True
+		for i in self._weighted_order(self._domain(chosen)):
+			if self.deadline is not None and time.monotonic() > self.deadline:
+				raise SolverTimeout()
+			chosen.append(i)
+			# Forward check: don't descend if the next game already has nothing left
+			if (game_num + 1 == len(self.game_masks) or self._domain(chosen)) and self._solve(chosen):
+				return True
+			chosen.pop()
+		return False
+
+	def _weighted_order(self, mask):
+		# Weighted random permutation (Efraimidis-Spirakis): the first candidate is
+		# distributed exactly like a greedy weighted pick.
+		keyed = []
+		for i in self.tables.index.indices(mask):
+			weight = self.weights.get(i, 0.0)
+			key = self.rng.random() ** (1.0 / weight) if weight > 0 else -1.0
+			keyed.append((key, i))
+		keyed.sort(reverse=True)
+		return [i for _, i in keyed]
+
+	def _domain(self, chosen, relaxed=None):
+		tables = self.tables
+		index = tables.index
+		config = self.config
+		relaxed = self.relaxed if relaxed is None else relaxed
+		mask = self.game_masks[len(chosen)] & index.not_bad_mask
+
+		if 'max_maps_per_mode' not in relaxed:
+			mask = self._limit_maps_per_mode(mask, chosen)
+
+		if 'min_games_before_repeat_mode' not in relaxed and config.min_games_before_repeat_mode > 0:
+			recent_modes = [index.mapmode_list[i].mode_name for i in chosen[::-1]] + self.ctx_recent_modes
+			for mode_name in recent_modes[:config.min_games_before_repeat_mode]:
+				mask &= ~index.mode_mask(mode_name)
+
+		map_mask = 0
+		if 'distinct_maps_in_round' not in relaxed:
+			map_mask |= self.ctx_round_map_mask
+			for i in chosen:
+				map_mask |= tables.same_map[i]
+		if 'distinct_maps_in_consecutive_rounds' not in relaxed:
+			map_mask |= self.ctx_previous_map_mask
+		mask &= ~map_mask
+
+		if 'max_non_preferred_maps_per_round' not in relaxed:
+			okay_count = self.ctx_okay_count + sum(1 for i in chosen if tables.okay[i])
+			if okay_count >= config.max_non_preferred_maps_per_round:
+				mask &= index.good_mask
+		return mask
+
+	def _limit_maps_per_mode(self, mask, chosen):
+		index = self.tables.index
+		max_maps_per_mode = self.config.max_maps_per_mode
+		game_counts = dict(self.round_ctx.mode_game_counts)
+		used_masks = dict(self.ctx_used_masks)
+		for i in chosen:
+			mode = index.mapmode_list[i].mode_name
+			if game_counts.get(mode, 0) < max_maps_per_mode:
+				used_masks[mode] = used_masks.get(mode, 0) | index.key_masks[index.mapmode_list[i].key]
+			game_counts[mode] = game_counts.get(mode, 0) + 1
+		for mode, game_count in game_counts.items():
+			if game_count >= max_maps_per_mode:
+				mode_mask = index.mode_mask(mode)
+				mask = (mask & ~mode_mask) | (mask & mode_mask & used_masks.get(mode, 0))
+		return mask
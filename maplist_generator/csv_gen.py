@@ -0,0 +1,48 @@
+import os
+import sys
+from .export import export_files, export_tournament, get_export_name
+"""Coverts tournament data output by tournament_gen.py to
+   EGTV Readable CSV Format
+   
+   author: NintenZone
+"""
+
+
+def write_mappool_csv(data, file_name):
+    export_files(data, {'mappool_csv': file_name})
+
+
+def write_rounds_csv(data, file_name):
+    export_files(data, {'rounds_csv': file_name})
+
+
+def write_discord_txt(data, file_name):
+    export_files(data, {'discord_txt': file_name})
+
+
+def main(argv=None):
+    import json
+    argv = sys.argv[1:] if argv is None else argv
+
+    if len(argv) == 1:
+        name = get_export_name(argv[0])
+        print("Creating files...")
+
+        with open(argv[0], encoding="utf-8") as jsonInput:
+            data = json.load(jsonInput)
+
+        for path in export_tournament(data, "output", name, ['csv']):
+            print("Completed " + os.path.basename(path))
+        print("")
+        print("Saved all files to the output directory successfully. The program will now exit.")
+
+    else:
+        print('You have entered too many or too few arguments.')
+        print('You must run this program as follows:')
+        print('python csv_gen.py <input_file.json>')
+        print('')
+        print('If the JSON is not from tournament_gen.py, the program may exit unexpectedly.')
+
+
+if __name__ == "__main__":
+    main()
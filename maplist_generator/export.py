@@ -0,0 +1,238 @@
+import os
+from contextlib import ExitStack
+from .tournament_gen import COUNTERPICK, get_stage_key
+
+"""Writes a generated tournament as IPL overlay JSON, EGTV CSV files and Discord
+   messages in a single pass over its rounds.
+
+   Stages can be in any of tournament_gen's stage formats. Structured records and
+   the MapMode objects of create_tournament(..., stage_format='mapmode') are used
+   as they are, only legacy "Mode on Map" strings have to be split.
+"""
+
+DISCORD_MESSAGE_LENGTH = 2000
+DISCORD_NEW_MESSAGE = "=====BEGIN NEW MESSAGE====="
+# Output files are written through buffers of this size, not once per round
+BUFFER_SIZE = 1 << 16
+
+# format -> file name, {name} is replaced by the export name
+EXPORT_FILES = {
+	'ipl_json': '{name}_IPL.json',
+	'ipl_discord': '{name}_discord.md',
+	'rounds_csv': 'rounds.csv',
+	'mappool_csv': 'mappool.csv',
+	'discord_txt': 'discord_{name}.txt',
+}
+
+# Names for several formats at once
+FORMAT_GROUPS = {
+	'ipl': ['ipl_json', 'ipl_discord'],
+	'csv': ['rounds_csv', 'mappool_csv', 'discord_txt'],
+	'all': list(EXPORT_FILES),
+}
+
+
+def get_export_formats(formats):
+	"""Expands format groups, keeping the order formats were given in."""
+	expanded = []
+	for fmt in formats:
+		for name in FORMAT_GROUPS.get(fmt, [fmt]):
+			if name not in EXPORT_FILES:
+				raise RuntimeError(f'Unknown export format {name}')
+			if name not in expanded:
+				expanded.append(name)
+	return expanded
+
+
+class IplJsonWriter:
+	"""Rounds as IPL overlay JSON, with the same layout as json.dump(rounds, f, indent=4)."""
+	newline = None
+
+	def __init__(self, f, tournament):
+		import json
+		self.f = f
+		self.dumps = json.dumps
+		self.num_rounds = 0
+
+	def write_round(self, round_name, num_games, stages):
+		cur_round = {
+			"name": round_name,
+			"maps": [{"map": "Unknown Map", "mode": "Unknown Mode"} if stage is None
+				else {"map": stage[1], "mode": stage[0]} for stage in stages]
+		}
+		self.f.write("[\n" if self.num_rounds == 0 else ",\n")
+		self.f.write("    " + self.dumps(cur_round, indent=4).replace("\n", "\n    "))
+		self.num_rounds += 1
+
+	def close(self):
+		self.f.write("\n]" if self.num_rounds else "[]")
+
+
+class IplDiscordWriter:
+	"""Rounds as a Discord message for IPL."""
+	newline = None
+
+	def __init__(self, f, tournament):
+		self.f = f
+
+	def write_round(self, round_name, num_games, stages):
+		self.f.write(f"\n**\n{round_name}\n**\n")
+		for stage in stages:
+			self.f.write(f"{COUNTERPICK if stage is None else f'{stage[0]} on {stage[1]}'}\n")
+
+	def close(self):
+		pass
+
+
+class RoundsCsvWriter:
+	"""Rounds in the EGTV rounds.csv format. Counterpicks use the Counterpick row of mappool.csv."""
+	newline = ""
+
+	def __init__(self, f, tournament):
+		import csv
+		self.writer = csv.writer(f, delimiter=",", quotechar='"', quoting=csv.QUOTE_MINIMAL)
+		rounds_header = ["nameFull", "nameShort", "isCounterpickable", "bestOf", "styleOfPlay"]
+		max_round_maps = max((rd["num_games"] for rd in tournament["rounds"]), default=0)
+		for i in range(1, max_round_maps + 1):
+			rounds_header.append("mode" + str(i))
+			rounds_header.append("mapName" + str(i))
+		self.writer.writerow(rounds_header)
+
+	def write_round(self, round_name, num_games, stages):
+		next_row = [round_name, round_name, 0, num_games]
+		for stage in stages:
+			next_row.extend((COUNTERPICK, COUNTERPICK) if stage is None else stage)
+		self.writer.writerow(next_row)
+
+	def close(self):
+		pass
+
+
+class MappoolCsvWriter:
+	"""The map pool in the EGTV mappool.csv format."""
+	newline = ""
+
+	def __init__(self, f, tournament):
+		import csv
+		map_pool = tournament.get("map_pool", {})
+		writer = csv.writer(f, delimiter=",", quotechar='"', quoting=csv.QUOTE_MINIMAL)
+		max_pool_maps = max((len(maps) for maps in map_pool.values()), default=0)
+		writer.writerow(["Mode", "Count"] + ["map" + str(i) for i in range(1, max_pool_maps + 1)])
+		for mode_name, maps in map_pool.items():
+			writer.writerow([mode_name, len(maps)] + list(maps))
+		writer.writerow(["Counterpick", "1", "Counterpick"])
+		writer.writerow(["Random", "1", "Random"])
+
+	def write_round(self, round_name, num_games, stages):
+		pass
+
+	def close(self):
+		pass
+
+
+class DiscordTxtWriter:
+	"""The map pool and rounds as Discord messages of at most DISCORD_MESSAGE_LENGTH characters."""
+	newline = None
+
+	def __init__(self, f, tournament):
+		self.f = f
+		self.length = 0
+		self.write_line("__**MAP POOL**__")
+		self.write_line("")
+		for mode_name, maps in tournament.get("map_pool", {}).items():
+			self.write_line("**" + mode_name + "**")
+			for map_name in maps:
+				self.write_line(map_name)
+			self.write_line("")
+		self.write_line(DISCORD_NEW_MESSAGE)
+
+	def write_line(self, line):
+		if self.length + len(line) > DISCORD_MESSAGE_LENGTH:
+			self.length = 0
+			self.f.write("\n" + DISCORD_NEW_MESSAGE + "\n")
+		self.f.write(line + "\n")
+		self.length += len(line)
+
+	def write_round(self, round_name, num_games, stages):
+		self.write_line("**" + round_name + "**")
+		for stage in stages:
+			self.write_line(COUNTERPICK if stage is None else f"{stage[0]} on {stage[1]}")
+		self.write_line("")
+
+	def close(self):
+		pass
+
+
+EXPORT_WRITERS = {
+	'ipl_json': IplJsonWriter,
+	'ipl_discord': IplDiscordWriter,
+	'rounds_csv': RoundsCsvWriter,
+	'mappool_csv': MappoolCsvWriter,
+	'discord_txt': DiscordTxtWriter,
+}
+
+
+def export_files(tournament, file_names):
+	"""Writes tournament to file_names, a dict of format -> file name, reading each round once."""
+	with ExitStack() as stack:
+		writers = []
+		for fmt, file_name in file_names.items():
+			writer_class = EXPORT_WRITERS[fmt]
+			f = stack.enter_context(open(file_name, "w", newline=writer_class.newline, encoding="utf-8", buffering=BUFFER_SIZE))
+			writers.append(writer_class(f, tournament))
+		for rd in tournament["rounds"]:
+			stages = [get_stage_key(stage) for stage in rd["stages"]]
+			for writer in writers:
+				writer.write_round(rd["round_name"], rd["num_games"], stages)
+		for writer in writers:
+			writer.close()
+
+
+def export_tournament(tournament, output_dir=".", name="tournament", formats=('all',)):
+	"""Writes tournament, as returned by create_tournament, to output_dir in each of formats.
+
+	   Returns the paths written.
+	"""
+	file_names = {fmt: os.path.join(output_dir, EXPORT_FILES[fmt].format(name=name))
+		for fmt in get_export_formats(formats)}
+	if output_dir:
+		os.makedirs(output_dir, exist_ok=True)
+	export_files(tournament, file_names)
+	return list(file_names.values())
+
+
+def get_export_name(file_name):
+	"""Export name for a tournament JSON file, its file name without the extension."""
+	return os.path.splitext(os.path.basename(file_name))[0]
+
+
+def build_parser():
+	import argparse
+	parser = argparse.ArgumentParser(description='Export a tournament JSON from tournament_gen.py as IPL JSON, EGTV CSV and Discord messages.')
+	parser.add_argument('input_file', help="Tournament JSON output by tournament_gen.py.")
+
+	parser.add_argument('-o', '--output_dir', '--output',
+		default="output", help="Directory to write the files to. Created if it does not exist. Default ./output.")
+
+	parser.add_argument('-f', '--formats', '--format', nargs='+', default=['all'],
+		choices=list(EXPORT_FILES) + list(FORMAT_GROUPS),
+		help="Formats to write. 'ipl' is ipl_json and ipl_discord, 'csv' is rounds_csv, mappool_csv and discord_txt. Default all.")
+
+	parser.add_argument('-n', '--name', default=None,
+		help="Name used in the exported file names. Defaults to the input file name.")
+	return parser
+
+
+def main(argv=None):
+	import json
+	parsed_args = build_parser().parse_args(argv)
+
+	with open(parsed_args.input_file, encoding="utf-8") as f:
+		tournament = json.load(f)
+	name = parsed_args.name or get_export_name(parsed_args.input_file)
+	for path in export_tournament(tournament, parsed_args.output_dir, name, parsed_args.formats):
+		print(f"Created {path}")
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,267 @@
+import os
+import time
+from collections import Counter
+from .tournament_gen import get_stage_key
+
+"""Map history of recurring events, kept across runs in an SQLite database.
+
+   Every recorded event adds its games to a series, e.g. one weekly tournament.
+   Next to the events themselves, each series keeps a running decayed game count
+   per mapmode, so reading the history of a series is one row per mapmode no
+   matter how many events it has. A count halves every half_life events.
+
+   get_score_factors turns the counts into factors that lower the scores of
+   mapmodes the series played a lot recently. CompiledTournament applies them
+   in the same place as decreased_past_mapmode_likelihood lowers the scores of
+   mapmodes from the last few rounds.
+"""
+
+DEFAULT_HALF_LIFE = 4.0
+# A mapmode with r times the series' average decayed game count has its score multiplied by 1 / (1 + HISTORY_PENALTY * r)
+HISTORY_PENALTY = 0.5
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS series (
+	name TEXT PRIMARY KEY,
+	half_life REAL NOT NULL,
+	num_events INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS events (
+	id INTEGER PRIMARY KEY,
+	series TEXT NOT NULL REFERENCES series (name),
+	seq INTEGER NOT NULL,
+	name TEXT,
+	seed INTEGER,
+	recorded_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS events_by_series ON events (series, seq);
+CREATE TABLE IF NOT EXISTS plays (
+	event_id INTEGER NOT NULL REFERENCES events (id),
+	mode TEXT NOT NULL,
+	map TEXT NOT NULL,
+	games INTEGER NOT NULL,
+	PRIMARY KEY (event_id, mode, map)
+);
+CREATE TABLE IF NOT EXISTS mapmode_stats (
+	series TEXT NOT NULL REFERENCES series (name),
+	mode TEXT NOT NULL,
+	map TEXT NOT NULL,
+	total_games INTEGER NOT NULL,
+	decayed_games REAL NOT NULL,
+	last_seq INTEGER NOT NULL,
+	PRIMARY KEY (series, mode, map)
+);
+"""
+
+
+def get_default_history_path():
+	"""$MAPLIST_HISTORY_DB, or history.sqlite3 in the user's data directory."""
+	if os.environ.get('MAPLIST_HISTORY_DB'):
+		return os.environ['MAPLIST_HISTORY_DB']
+	base_dir = os.environ.get('XDG_DATA_HOME') or os.path.join(os.path.expanduser("~"), ".local", "share")
+	return os.path.join(base_dir, "maplist_generator", "history.sqlite3")
+
+
+def get_played_games(output_dict):
+	"""(mode, map) -> number of games of it in a tournament output. Counterpicks are not counted."""
+	games = Counter()
+	for rd in output_dict['rounds']:
+		for stage in rd['stages']:
+			key = get_stage_key(stage)
+			if key is not None:
+				games[key] += 1
+	return games
+
+
+def get_score_factors(decayed_games, penalty=HISTORY_PENALTY, pool_keys=None):
+	"""Score factors for decayed game counts, relative to the average count so that
+	   the penalty doesn't grow with the number of games per event.
+
+	   With pool_keys, the (mode, map) keys of a map pool, the average is over the
+	   whole pool, counting mapmodes the series never played as 0, and only
+	   mapmodes of the pool get a factor. Otherwise it is over the played mapmodes.
+	"""
+	num_keys = len(decayed_games)
+	if pool_keys is not None:
+		pool_keys = set(pool_keys)
+		decayed_games = {key: decayed for key, decayed in decayed_games.items() if key in pool_keys}
+		num_keys = len(pool_keys)
+	if not decayed_games:
+		return {}
+	average = sum(decayed_games.values()) / num_keys
+	if average <= 0:
+		return {}
+	return {key: 1.0 / (1.0 + penalty * decayed / average) for key, decayed in decayed_games.items()}
+
+
+class HistoryStore:
+	def __init__(self, path=None, half_life=DEFAULT_HALF_LIFE):
+		"""half_life (in events) is only used for series recorded for the first time."""
+		import sqlite3
+		self.path = path or get_default_history_path()
+		if os.path.dirname(self.path):
+			os.makedirs(os.path.dirname(self.path), exist_ok=True)
+		self.half_life = half_life
+		self.connection = sqlite3.connect(self.path)
+		self.connection.executescript(SCHEMA)
+
+	def close(self):
+		self.connection.close()
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, *exc_info):
+		self.close()
+
+	def get_series(self, series):
+		"""(half_life, num_events) of series, or None if nothing was recorded for it."""
+		return self.connection.execute("SELECT half_life, num_events FROM series WHERE name = ?", (series,)).fetchone()
+
+	def list_series(self):
+		"""[(name, half_life, num_events)] of every series."""
+		return self.connection.execute("SELECT name, half_life, num_events FROM series ORDER BY name").fetchall()
+
+	def record_event(self, series, games, name=None, seed=None):
+		"""Adds an event to series. games maps (mode, map) to the number of games of it,
+		   as returned by get_played_games. Returns the event's number in the series, starting at 1.
+		"""
+		with self.connection:
+			row = self.get_series(series)
+			if row is None:
+				half_life, num_events = self.half_life, 0
+				self.connection.execute("INSERT INTO series (name, half_life, num_events) VALUES (?, ?, 0)", (series, half_life))
+			else:
+				half_life, num_events = row
+			seq = num_events + 1
+			decay = 0.5 ** (1.0 / half_life)
+			event_id = self.connection.execute(
+				"INSERT INTO events (series, seq, name, seed, recorded_at) VALUES (?, ?, ?, ?, ?)",
+				(series, seq, name, seed, time.time())).lastrowid
+			self.connection.executemany("INSERT INTO plays (event_id, mode, map, games) VALUES (?, ?, ?, ?)",
+				[(event_id, mode_name, map_name, count) for (mode_name, map_name), count in games.items()])
+
+			stats = {(mode_name, map_name): (total_games, decayed_games, last_seq) for mode_name, map_name, total_games, decayed_games, last_seq
+				in self.connection.execute("SELECT mode, map, total_games, decayed_games, last_seq FROM mapmode_stats WHERE series = ?", (series,))}
+			rows = []
+			for key, count in games.items():
+				total_games, decayed_games, last_seq = stats.get(key, (0, 0.0, seq))
+				rows.append((series, key[0], key[1], total_games + count, decayed_games * decay ** (seq - last_seq) + count, seq))
+			self.connection.executemany("INSERT OR REPLACE INTO mapmode_stats "
+				"(series, mode, map, total_games, decayed_games, last_seq) VALUES (?, ?, ?, ?, ?, ?)", rows)
+			self.connection.execute("UPDATE series SET num_events = ? WHERE name = ?", (seq, series))
+		return seq
+
+	def record_tournament(self, series, output_dict, name=None, seed=None):
+		"""record_event with the games of a tournament output."""
+		return self.record_event(series, get_played_games(output_dict), name, seed)
+
+	def get_mapmode_stats(self, series):
+		"""(mode, map) -> (total games, decayed games as of the latest event) for every mapmode series played."""
+		row = self.get_series(series)
+		if row is None:
+			return {}
+		half_life, num_events = row
+		decay = 0.5 ** (1.0 / half_life)
+		return {(mode_name, map_name): (total_games, decayed_games * decay ** (num_events - last_seq))
+			for mode_name, map_name, total_games, decayed_games, last_seq in self.connection.execute(
+				"SELECT mode, map, total_games, decayed_games, last_seq FROM mapmode_stats WHERE series = ?", (series,))}
+
+	def get_score_factors(self, series, penalty=HISTORY_PENALTY, pool_keys=None):
+		"""(mode, map) -> factor in (0, 1] to multiply its score by, for every mapmode series played.
+
+		   pool_keys are the (mode, map) keys of the map pool the factors are for, see get_score_factors.
+		"""
+		decayed_games = {key: decayed for key, (_, decayed) in self.get_mapmode_stats(series).items()}
+		return get_score_factors(decayed_games, penalty, pool_keys)
+
+	def get_events(self, series):
+		"""[(number in series, name, seed, time recorded)] of every event of series, oldest first."""
+		return self.connection.execute("SELECT seq, name, seed, recorded_at FROM events WHERE series = ? ORDER BY seq",
+			(series,)).fetchall()
+
+
+def get_tournament_score_factors(history_store, series, mapmode_list, tournament_dict):
+	"""Score factors of series for generating tournament_dict from mapmode_list, or None
+	   if the tournament wouldn't apply them because decreased_past_mapmode_likelihood is off.
+	"""
+	from .mapmode_pool import MapPoolConfig
+	tournament_config = tournament_dict.get('tournament_config', {})
+	if not tournament_config.get('decreased_past_mapmode_likelihood', MapPoolConfig().decreased_past_mapmode_likelihood):
+		print(f"Not using the history of series {series}, decreased_past_mapmode_likelihood is off")
+		return None
+	score_factors = history_store.get_score_factors(series, pool_keys=[mapmode.key for mapmode in mapmode_list])
+	print(f"Using the history of {len(score_factors)} mapmodes in series {series}")
+	return score_factors
+
+
+def add_history_arguments(parser, record=True):
+	parser.add_argument('--series', default=None,
+		help="Event series to take map history from. Mapmodes the series played a lot in recent events become less likely.")
+
+	if record:
+		parser.add_argument('--record', action='store_true',
+			help="Add the generated maplist to the --series history.")
+
+	parser.add_argument('--history_db', default=None,
+		help="History database file. Defaults to $MAPLIST_HISTORY_DB or ~/.local/share/maplist_generator/history.sqlite3.")
+
+
+def build_parser():
+	import argparse
+	parser = argparse.ArgumentParser(description='Record and inspect the map history of event series.')
+	parser.add_argument('--history_db', default=None,
+		help="History database file. Defaults to $MAPLIST_HISTORY_DB or ~/.local/share/maplist_generator/history.sqlite3.")
+	subparsers = parser.add_subparsers(dest='action', required=True)
+
+	record_parser = subparsers.add_parser('record', help="Add a tournament output to a series.")
+	record_parser.add_argument('series', help="Name of the series.")
+	record_parser.add_argument('input_files', nargs='+', help="Tournament JSON outputs, recorded as one event each, in order.")
+	record_parser.add_argument('--half_life', type=float, default=DEFAULT_HALF_LIFE,
+		help=f"Events after which a game counts half as much, for a new series. Default {DEFAULT_HALF_LIFE:g}.")
+
+	show_parser = subparsers.add_parser('show', help="Show how much each mapmode of a series is held back.")
+	show_parser.add_argument('series', help="Name of the series.")
+	show_parser.add_argument('--top', type=int, default=None, help="Only list the TOP most held back mapmodes.")
+	show_parser.add_argument('-m', '--map_pool_file', default=None,
+		help="Map pool the score factors are for, as when generating from it. Without one, they are relative to the played mapmodes only.")
+
+	subparsers.add_parser('list', help="List the series in the database.")
+	return parser
+
+
+def main(argv=None):
+	import json
+	parsed_args = build_parser().parse_args(argv)
+
+	with HistoryStore(parsed_args.history_db, getattr(parsed_args, 'half_life', DEFAULT_HALF_LIFE)) as store:
+		if parsed_args.action == 'record':
+			for input_file in parsed_args.input_files:
+				with open(input_file, encoding="utf-8") as f:
+					output_dict = json.load(f)
+				seq = store.record_tournament(parsed_args.series, output_dict, os.path.basename(input_file))
+				print(f"Recorded {input_file} as event {seq} of {parsed_args.series}")
+		elif parsed_args.action == 'show':
+			stats = store.get_mapmode_stats(parsed_args.series)
+			if not stats:
+				print(f"Nothing recorded for {parsed_args.series}")
+				return
+			half_life, num_events = store.get_series(parsed_args.series)
+			print(f"{parsed_args.series}: {num_events} events, half life {half_life:g} events\n")
+			print(f"{'mapmode':<48} {'games':>6} {'recent':>7} {'score factor':>13}")
+			pool_keys = None
+			if parsed_args.map_pool_file:
+				from .mapmode_pool import read_map_pool_from_file
+				pool_keys = [mapmode.key for mapmode in read_map_pool_from_file(parsed_args.map_pool_file)]
+			score_factors = get_score_factors({key: decayed for key, (_, decayed) in stats.items()}, pool_keys=pool_keys)
+			entries = sorted(stats.items(), key=lambda item: (-item[1][1], item[0]))
+			for key, (total_games, decayed_games) in entries[:parsed_args.top]:
+				name = f"{key[0]} on {key[1]}"
+				print(f"{name:<48} {total_games:>6} {decayed_games:>7.2f} {score_factors.get(key, 1.0):>13.3f}")
+		else:
+			for name, half_life, num_events in store.list_series():
+				print(f"{name}: {num_events} events, half life {half_life:g} events")
+
+
+if __name__ == "__main__":
+	main()
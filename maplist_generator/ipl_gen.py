@@ -0,0 +1,51 @@
+import os
+import sys
+from .export import export_files, export_tournament, get_export_name
+"""
+Coverts tournament data output by tournament_gen.py to
+IPL Readable JSON format
+   
+author: vlee489 
+"""
+
+
+def generate_json(maps: dict, file_name: str):
+    """
+    Generate IPL compliant json file
+
+    Args:
+        maps (dict): list of maps generated by tournament_gen.py
+        file_name (str): Name that you want the file fo be saved as
+    """
+    export_files({"rounds": maps}, {"ipl_json": file_name})
+
+
+def generate_discord(maps: dict, file_name: str):
+    """
+    Generate and save IPL map Discord message
+
+    Args:
+        maps (dict): list of maps generated by tournament_gen.py
+        file_name (str): Name that you want the file fo be saved as
+    """
+    export_files({"rounds": maps}, {"ipl_discord": file_name})
+
+
+def main(argv=None):
+    import json
+    argv = sys.argv[1:] if argv is None else argv
+
+    if len(argv) == 1:
+        with open(argv[0], encoding="utf-8") as input_file:
+            data = json.load(input_file)
+        print("Generating IPL Overlay JSON file and Discord Message")
+        export_tournament(data, os.path.dirname(argv[0]), get_export_name(argv[0]), ['ipl'])
+    else:
+        print('You have entered too many or too few arguments.')
+        print('You must run this program as follows:')
+        print('python ipl_gen.py <input_file.json>\n')
+        print('If the JSON is not from tournament_gen.py, the program may exit unexpectedly.')
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+import random
+import os
+import sys
+from itertools import islice
+from .mapmode_pool import MapMode, MapModePool, MapPoolConfig, \
+	to_mapmode_list, get_map_pool_by_mode, read_map_pool_from_file, read_tournament_from_file
+
+"""Generates a Maplist based on a scored map pool.
+   
+   author: bjackson8bit
+"""
+
+
+def check_positive(value):
+    import argparse
+    ivalue = int(value)
+    if ivalue <= 0:
+        raise argparse.ArgumentTypeError("%s is an invalid positive int value" % value)
+    return ivalue
+
+def check_quality_score(value):
+    import argparse
+    ivalue = int(value)
+    if ivalue <= 0 or ivalue >= 10:
+        raise argparse.ArgumentTypeError("%s is an invalid map quality int value" % value)
+    return ivalue
+
+
+example_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.realpath(__file__))), "examples/")
+ex_map_pool = os.path.join(example_dir, "example_map_pool.json")
+ex_tournament = os.path.join(example_dir, "example_tournament.json")
+
+def build_parser():
+	import argparse
+	parser = argparse.ArgumentParser(description='Create a continuous map list from a map pool.')
+
+	parser.add_argument('-m', '--map_pool_file', '--map_pool', '--map_pool_config', '--mappool_config', 
+		default=ex_map_pool, help="Generate a maplist using a custom json map pool config file.")
+
+	parser.add_argument('-g', '--num_games', '--games' , type=check_positive,
+		default=None, help="Number of games to be generated. Default 7, or no limit with --stream.")
+
+	parser.add_argument('-q', '--map_quality', '--quality', type=check_quality_score,
+		default=5, help="Map quality, a number between 0 - 10. Higher number means higher scored maps appear more often. Default 5.")
+
+	parser.add_argument('-o', '--output_file', '--output',
+		default=None, help="Outputs maplist as a JSON to the specified file. Creates it if it does not exist.")
+
+	parser.add_argument('-s', '--seed', type=int,
+		default=None, help="Seed for the random generator. Runs with the same seed and inputs produce the same maplist.")
+
+	parser.add_argument('--stream', action='store_true',
+		help="Print each mapmode on its own line as it is generated, until NUM_GAMES or forever if not given.")
+
+	parser.add_argument('--window', type=check_positive,
+		default=None, help="With --stream, games before maps may repeat. Default half the maps in the pool.")
+
+	from .result_cache import add_cache_arguments
+	add_cache_arguments(parser)
+	return parser
+
+
+def get_continuous_map_pool_config(mapmode_list):
+	distinct_modes = len(get_map_pool_by_mode(mapmode_list).keys())
+	return MapPoolConfig(exclude_map_score_threshold=5.5, 
+		preferred_map_score_threshold=7, 
+		max_non_preferred_maps_per_round=10,
+		distinct_maps_in_consecutive_rounds=True,
+		min_games_before_repeat_mode=distinct_modes - 1,
+		decreased_past_mapmode_likelihood=True,
+		max_maps_per_mode=10)
+
+
+def get_default_window(mapmode_pool):
+	"""Half the maps that can be picked, so consecutive windows can use different maps."""
+	index = mapmode_pool.index
+	num_maps = len({index.mapmode_list[i].map_name for i in index.indices(index.not_bad_mask)})
+	return max(num_maps // 2, 1)
+
+
+def iter_continuous_maplist(mapmode_list, map_quality=5, rng=None, window=None):
+	"""Yields mapmodes one at a time, forever.
+
+	   The stream is split into windows of window games that are treated like
+	   the rounds of a tournament: no map repeats within a window, consecutive
+	   windows avoid each other's maps, and recently played mapmodes are less
+	   likely. max_maps_per_mode only counts the games of the last few windows.
+	   Only those windows are kept, so memory stays bounded however many games
+	   are taken. window defaults to half the number of maps in the pool.
+	"""
+	rng = rng or random.Random()
+	mapmode_pool = MapModePool(mapmode_list, get_continuous_map_pool_config(mapmode_list))
+	window = window or get_default_window(mapmode_pool)
+	round_ctx = mapmode_pool.new_round_context()
+	while True:
+		for _ in range(window):
+			filtered_pool = mapmode_pool.filter_from_ctx(round_ctx)
+			chosen_mapmode = filtered_pool.random_choice(map_quality, rng)
+			round_ctx.append_game(chosen_mapmode)
+			yield chosen_mapmode
+		round_ctx.finalize_round()
+		round_ctx.recount_past_rounds()
+
+
+def create_continuous_maplist(mapmode_list, num_games, map_quality=5, rng=None):
+	"""Generates num_games mapmodes. Pass a seeded random.Random as rng for a reproducible result."""
+	maplist = islice(iter_continuous_maplist(mapmode_list, map_quality, rng, window=num_games), num_games)
+	return [str(mapmode) for mapmode in maplist]
+
+
+def stream_maplist(maplist, out, output_file=None):
+	"""Writes each mapmode of maplist to out as its own line as soon as it is generated."""
+	f = open(output_file, "w+") if output_file else None
+	try:
+		for mapmode in maplist:
+			line = f"{mapmode}\n"
+			out.write(line)
+			out.flush()
+			if f:
+				f.write(line)
+				f.flush()
+	finally:
+		if f:
+			f.close()
+
+
+def main(argv=None):
+	parsed_args = build_parser().parse_args(argv)
+	# Keep stdout to the maplist alone when streaming
+	info = sys.stderr if parsed_args.stream else sys.stdout
+
+	print(f"Using map pool file {parsed_args.map_pool_file}", file=info)
+	seed = parsed_args.seed if parsed_args.seed is not None else random.SystemRandom().getrandbits(32)
+	print(f"Using seed {seed}", file=info)
+
+	mapmode_list = read_map_pool_from_file(parsed_args.map_pool_file)
+	from .result_cache import get_cache_from_args
+	cache = get_cache_from_args(parsed_args, info)
+
+	if parsed_args.stream:
+		maplist = iter_continuous_maplist(mapmode_list, parsed_args.map_quality, random.Random(seed), parsed_args.window)
+		if parsed_args.num_games:
+			maplist = islice(maplist, parsed_args.num_games)
+		try:
+			stream_maplist(maplist, sys.stdout, parsed_args.output_file)
+		except BrokenPipeError:
+			# The reader went away, e.g. piped into head. Point stdout at devnull so
+			# the interpreter does not fail again flushing it on exit.
+			os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+		except KeyboardInterrupt:
+			pass
+		return
+
+	if cache is not None and parsed_args.seed is not None:
+		maplist = cache.create_continuous_maplist(mapmode_list, parsed_args.num_games or 7, parsed_args.map_quality, seed)
+	else:
+		maplist = create_continuous_maplist(mapmode_list, parsed_args.num_games or 7, parsed_args.map_quality, random.Random(seed))
+	maplist_str = '\n'.join(maplist)
+	if parsed_args.output_file:
+		print(parsed_args.output_file)
+		with open(parsed_args.output_file, "w+") as f:
+			f.write(maplist_str)
+	print(maplist_str)
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,769 @@
+import random
+from collections import OrderedDict, defaultdict, deque
+from itertools import islice, accumulate
+from bisect import bisect
+from . import tracing
+
+"""Backend code for handling maplist and tournament configurations, and transforming map pools.
+
+   author: bjackson8bit
+"""
+
+# Below this many mapmodes the numpy setup costs more than the Python loop it replaces
+NUMPY_MIN_POOL_SIZE = 64
+
+# Games a RoundContext keeps the modes of, unless min_games_before_repeat_mode needs more
+DEFAULT_MAX_RECENT_GAMES = 16
+
+# Sampling tables kept per MapModeIndex. Past this many the least recently used is dropped.
+SAMPLING_TABLE_CACHE_SIZE = 4096
+
+# numpy module, False until the first large pool is sampled and None if it isn't installed.
+# Imported lazily since importing numpy costs more than most runs spend generating.
+_np = False
+
+
+def get_numpy():
+	global _np
+	if _np is False:
+		try:
+			import numpy
+			_np = numpy
+		except ImportError:
+			_np = None
+	return _np
+
+
+class MapPoolConfig:
+	__slots__ = (
+		'exclude_map_score_threshold',
+		'preferred_map_score_threshold',
+		'max_non_preferred_maps_per_round',
+		'distinct_maps_in_consecutive_rounds',
+		'min_games_before_repeat_mode',
+		'decreased_past_mapmode_likelihood',
+		'max_maps_per_mode',
+		'alias_sampling',
+	)
+
+	# parameter name -> type its value must have
+	PARAMETER_TYPES = {
+		'exclude_map_score_threshold': float,
+		'preferred_map_score_threshold': float,
+		'max_non_preferred_maps_per_round': int,
+		'distinct_maps_in_consecutive_rounds': bool,
+		'min_games_before_repeat_mode': int,
+		'decreased_past_mapmode_likelihood': bool,
+		'max_maps_per_mode': int,
+		'alias_sampling': bool,
+	}
+
+	def __init__(self, 
+		exclude_map_score_threshold=6, 
+		preferred_map_score_threshold=8, 
+		max_non_preferred_maps_per_round=1,
+		distinct_maps_in_consecutive_rounds=True,
+		min_games_before_repeat_mode=2,
+		decreased_past_mapmode_likelihood=True,
+		max_maps_per_mode=10,
+		alias_sampling=False):
+		self.exclude_map_score_threshold = exclude_map_score_threshold
+		self.preferred_map_score_threshold = preferred_map_score_threshold
+		self.max_non_preferred_maps_per_round = max_non_preferred_maps_per_round
+		self.distinct_maps_in_consecutive_rounds = distinct_maps_in_consecutive_rounds
+		self.min_games_before_repeat_mode = max(min_games_before_repeat_mode, 3)
+		self.decreased_past_mapmode_likelihood = decreased_past_mapmode_likelihood
+		self.max_maps_per_mode = max_maps_per_mode
+		self.alias_sampling = alias_sampling
+
+	@classmethod
+	def from_dict(cls, config_dict):
+		"""Builds a config from the defaults and the parameters in config_dict, validating each."""
+		map_pool_config = cls()
+		for param_name, value in config_dict.items():
+			map_pool_config.set_parameter(param_name, value)
+		return map_pool_config
+
+	def set_parameter(self, param_name, value):
+		expected_type = MapPoolConfig.PARAMETER_TYPES.get(param_name)
+		if expected_type is None:
+			raise RuntimeError(f'Unknown map pool parameter {param_name}')
+		# bool is a subclass of int, so it has to be ruled out for the numeric parameters
+		if expected_type is bool:
+			valid = isinstance(value, bool)
+		elif expected_type is int:
+			valid = isinstance(value, int) and not isinstance(value, bool) and value >= 0
+		else:
+			valid = isinstance(value, (int, float)) and not isinstance(value, bool)
+		if not valid:
+			raise RuntimeError(f'Invalid value {value!r} for map pool parameter {param_name}, '
+				f'expected a {"non-negative " if expected_type is int else ""}{expected_type.__name__}')
+		setattr(self, param_name, value)
+
+	def to_dict(self):
+		return {param_name: getattr(self, param_name) for param_name in MapPoolConfig.__slots__}
+
+
+if hasattr(int, 'bit_count'):
+	# Python 3.10+
+	count_bits = int.bit_count
+else:
+	def count_bits(mask):
+		return bin(mask).count("1")
+
+
+def get_prob_weight_exponent(map_quality=5):
+	return 2.5 + (map_quality - 5.0) / 2.0
+
+
+class MapMode:
+	"""An immutable (mode, map) pair with its score.
+
+	   Two MapModes are equal, and hash the same, when they share a mode and map,
+	   even if one of them had its score lowered by MapModePool.filter_from_ctx.
+	"""
+	__slots__ = ('mode_name', 'map_name', 'score', 'key')
+
+	def __init__(self, mode_name, map_name, score=10):
+		object.__setattr__(self, 'mode_name', mode_name)
+		object.__setattr__(self, 'map_name', map_name)
+		object.__setattr__(self, 'score', score)
+		object.__setattr__(self, 'key', (mode_name, map_name))
+
+	def __setattr__(self, name, value):
+		raise AttributeError('MapMode is immutable')
+
+	def __reduce__(self):
+		return (MapMode, (self.mode_name, self.map_name, self.score))
+
+	def __eq__(self, other):
+		return isinstance(other, MapMode) and self.key == other.key
+
+	def __hash__(self):
+		return hash(self.key)
+
+	# Pretty arbitrary formula but the exponent is to exaggerate the
+	# difference in scores.
+	# Higher map quality raises the exponent, shrinking lower scores much more than higher ones.
+	def get_prob_weight(self, map_quality=5):
+		return (self.score / 10.0) ** get_prob_weight_exponent(map_quality)
+	
+	def clone(self):
+		# Immutable, so there is nothing to copy
+		return self
+
+	def __str__(self):
+		return f"{self.mode_name} on {self.map_name}"
+
+	def __repr__(self):
+		return f"{self.mode_name} on {self.map_name}"
+
+# RoundContext containers that change while a round is played, and those that only
+# change when a new mapmode is played or a round is finalized
+ROUND_STATE = ('current_round', 'recent_modes', 'current_round_maps', 'current_round_keys', 'mode_game_counts')
+PLAYED_STATE = ('_played_keys', 'mode_first_plays')
+HISTORY_STATE = ('past_rounds', 'last_played_round')
+
+# container name -> function copying it, for RoundContext._unshare
+_COPY_STATE = {
+	'current_round': list,
+	'recent_modes': lambda modes: deque(modes, maxlen=modes.maxlen),
+	'current_round_maps': dict,
+	'current_round_keys': lambda keys: defaultdict(int, keys),
+	'mode_game_counts': lambda counts: defaultdict(int, counts),
+	'_played_keys': set,
+	'mode_first_plays': lambda plays: defaultdict(list, {mode: list(mode_plays) for mode, mode_plays in plays.items()}),
+	# Finalized rounds are never changed, so they can stay shared
+	'past_rounds': lambda rounds: deque(rounds, maxlen=rounds.maxlen),
+	'last_played_round': dict,
+}
+
+
+class RoundContext:
+	"""Game history for a tournament, plus running summaries of it.
+
+	   Only the last max_past_rounds rounds and max_recent_games modes are kept,
+	   which is all MapModePool.filter_from_ctx looks at, so memory stays bounded
+	   however long the tournament runs. MapModePool.new_round_context keeps
+	   enough games for the pool's min_games_before_repeat_mode. The summaries are updated as games are
+	   appended rather than recomputed from the history on every pick.
+
+	   clone() is copy-on-write: the copy shares every container with the
+	   original, and each side only copies a container the first time it changes
+	   it. Branching a context is O(1), and a branch that never finalizes a round
+	   never copies the tournament-wide summaries.
+	"""
+	__slots__ = (
+		'past_rounds',
+		'current_round',
+		'num_past_rounds',
+		'recent_modes',
+		'previous_round_maps',
+		'current_round_maps',
+		'current_round_keys',
+		'last_played_round',
+		'mode_game_counts',
+		'mode_first_plays',
+		'_played_keys',
+		'_shared',
+	)
+
+	def __init__(self, past_rounds=None, max_past_rounds=4, max_recent_games=DEFAULT_MAX_RECENT_GAMES):
+		self.past_rounds = deque(maxlen=max_past_rounds)
+		self.current_round = []
+		self.num_past_rounds = 0
+		# Mode of the most recent games, oldest first
+		self.recent_modes = deque(maxlen=max_recent_games)
+		self.previous_round_maps = {}
+		self.current_round_maps = {}
+		# (mode, map) -> number of times played in the current round
+		self.current_round_keys = defaultdict(int)
+		# (mode, map) -> number of the last finalized round it was played in
+		self.last_played_round = {}
+		# mode -> number of games played in that mode
+		self.mode_game_counts = defaultdict(int)
+		# mode -> [(nth game of the mode, (mode, map))] for the first time each mapmode was played
+		self.mode_first_plays = defaultdict(list)
+		self._played_keys = set()
+		# Names of the containers shared with a clone, which must be copied before they are changed
+		self._shared = set()
+		for rd in past_rounds or []:
+			for game in rd:
+				self.append_game(game)
+			self.finalize_round()
+
+	def _unshare(self, names):
+		shared = self._shared
+		for name in names:
+			if name in shared:
+				setattr(self, name, _COPY_STATE[name](getattr(self, name)))
+				shared.discard(name)
+
+	def append_game(self, new_game):
+		if self._shared:
+			self._unshare(ROUND_STATE)
+		key = new_game.key
+		self.current_round.append(new_game)
+		self.recent_modes.append(new_game.mode_name)
+		self.current_round_maps[new_game.map_name] = True
+		self.current_round_keys[key] += 1
+		if key not in self._played_keys:
+			if self._shared:
+				self._unshare(PLAYED_STATE)
+			self._played_keys.add(key)
+			self.mode_first_plays[new_game.mode_name].append((self.mode_game_counts[new_game.mode_name], key))
+		self.mode_game_counts[new_game.mode_name] += 1
+		
+	def finalize_round(self):
+		if self._shared:
+			self._unshare(HISTORY_STATE)
+		for key in self.current_round_keys:
+			self.last_played_round[key] = self.num_past_rounds
+		self.past_rounds.append(self.current_round)
+		self.num_past_rounds += 1
+		self.previous_round_maps = self.current_round_maps
+		self.current_round = []
+		self.current_round_maps = {}
+		self.current_round_keys = defaultdict(int)
+		# The current round's containers are new, so only the ones not yet copied can still be shared
+		self._shared.difference_update(('current_round', 'current_round_maps', 'current_round_keys'))
+
+	def recount_past_rounds(self):
+		"""Counts the games of each mode, and the mapmodes each mode used first, over
+		   the kept past rounds only instead of every game since the context was created.
+
+		   max_maps_per_mode then limits a mode to the maps of its first games within
+		   the last max_past_rounds rounds, which an endless maplist needs so that it
+		   doesn't keep each mode on the same few maps forever.
+		"""
+		self.mode_game_counts = defaultdict(int)
+		self.mode_first_plays = defaultdict(list)
+		self._played_keys = set()
+		self._shared.difference_update(('mode_game_counts', 'mode_first_plays', '_played_keys'))
+		for rd in self.past_rounds:
+			for game in rd:
+				if game.key not in self._played_keys:
+					self._played_keys.add(game.key)
+					self.mode_first_plays[game.mode_name].append((self.mode_game_counts[game.mode_name], game.key))
+				self.mode_game_counts[game.mode_name] += 1
+
+	def get_recent_modes(self, num_games):
+		"""Modes of the last num_games games, most recent first."""
+		if num_games > self.recent_modes.maxlen:
+			raise RuntimeError(f'Only the modes of the last {self.recent_modes.maxlen} games are kept, not {num_games}. '
+				'Create the RoundContext with MapModePool.new_round_context')
+		return list(islice(reversed(self.recent_modes), max(num_games, 0)))
+
+	def get_used_mapmode_keys(self, mode_name, max_games):
+		"""(mode, map) keys played within the first max_games games of a mode."""
+		return [key for nth_game, key in self.mode_first_plays.get(mode_name, []) if nth_game < max_games]
+
+	def get_recently_played(self, num_rounds):
+		"""(mode, map) -> rounds ago it was last played, for mapmodes played in the last num_rounds rounds."""
+		recently_played = {}
+		for rd in islice(reversed(self.past_rounds), num_rounds):
+			for game in rd:
+				key = game.key
+				if key not in recently_played:
+					recently_played[key] = self.num_past_rounds - 1 - self.last_played_round[key]
+		return recently_played
+
+	def clone(self):
+		new_rd_ctx = RoundContext.__new__(RoundContext)
+		for name in RoundContext.__slots__:
+			setattr(new_rd_ctx, name, getattr(self, name))
+		# previous_round_maps is never changed, only replaced
+		self._shared = set(_COPY_STATE)
+		new_rd_ctx._shared = set(_COPY_STATE)
+		return new_rd_ctx
+
+	def __str__(self):
+		return str(list(self.past_rounds))
+	
+	def __repr__(self):
+		return repr(list(self.past_rounds))
+
+
+class SamplingTable:
+	"""Everything random_choice needs to pick from one filtered pool at one map quality.
+
+	   Inverse transform sampling bisects the cumulative weights. indices and
+	   weights are lists, or numpy arrays for large pools, whose cumulative weights
+	   stay a numpy array searched with searchsorted. The Walker alias table is
+	   only built on the first alias draw, after which each draw is O(1).
+	"""
+	__slots__ = ('indices', 'weights', 'cum_weights', 'is_array', '_alias_table')
+
+	def __init__(self, indices, weights):
+		self.indices = indices
+		self.weights = weights
+		self.is_array = not isinstance(weights, list)
+		self.cum_weights = get_numpy().cumsum(weights) if self.is_array else list(accumulate(weights))
+		self._alias_table = None
+
+	def choose_index(self, u):
+		cum_weights = self.cum_weights
+		if self.is_array:
+			position = int(cum_weights.searchsorted(u * cum_weights[-1], side="right"))
+			return int(self.indices[min(position, len(cum_weights) - 1)])
+		return self.indices[bisect(cum_weights, u * cum_weights[-1], 0, len(cum_weights) - 1)]
+
+	def choose_index_alias(self, u):
+		"""Picks with the alias method. Uses u for both the column and the coin flip."""
+		if self._alias_table is None:
+			self._alias_table = build_alias_table(self.weights.tolist() if self.is_array else self.weights)
+		prob, alias = self._alias_table
+		x = u * len(prob)
+		column = int(x)
+		return int(self.indices[column if x - column < prob[column] else alias[column]])
+
+
+def build_alias_table(weights):
+	"""(prob, alias) lists for Walker's alias method, built with Vose's algorithm.
+
+	   Column i is picked as itself with probability prob[i], otherwise as alias[i].
+	   With every weight 0 the last column is always picked, as when bisecting.
+	"""
+	n = len(weights)
+	total = sum(weights)
+	if total <= 0:
+		return [0.0] * n, [n - 1] * n
+	prob = [weight * n / total for weight in weights]
+	alias = list(range(n))
+	small = [i for i, p in enumerate(prob) if p < 1.0]
+	large = [i for i, p in enumerate(prob) if p >= 1.0]
+	while small and large:
+		less = small.pop()
+		more = large.pop()
+		alias[less] = more
+		prob[more] -= 1.0 - prob[less]
+		(small if prob[more] < 1.0 else large).append(more)
+	# Whatever is left is 1 up to rounding error
+	for i in small + large:
+		prob[i] = 1.0
+	return prob, alias
+
+
+class MapModeIndex:
+	"""Lookup tables built once over a mapmode list.
+
+	   Every pool derived from the same list shares one index, and selects its
+	   members with an integer bitmask where bit i is set when mapmode_list[i]
+	   is in the pool. Filtering a pool is then a single AND of two masks.
+	"""
+	def __init__(self, mapmode_list, map_pool_config):
+		self.mapmode_list = list(mapmode_list)
+		self.full_mask = (1 << len(self.mapmode_list)) - 1
+		self.map_masks = defaultdict(int)
+		self.mode_masks = defaultdict(int)
+		self.key_masks = defaultdict(int)
+		self.not_bad_mask = 0
+		self.okay_mask = 0
+		self.good_mask = 0
+		for i, mapmode in enumerate(self.mapmode_list):
+			bit = 1 << i
+			self.map_masks[mapmode.map_name] |= bit
+			self.mode_masks[mapmode.mode_name] |= bit
+			self.key_masks[mapmode.key] |= bit
+			if mapmode.score >= map_pool_config.exclude_map_score_threshold:
+				self.not_bad_mask |= bit
+				if mapmode.score < map_pool_config.preferred_map_score_threshold:
+					self.okay_mask |= bit
+			if mapmode.score >= map_pool_config.preferred_map_score_threshold:
+				self.good_mask |= bit
+		self.scores = [mapmode.score for mapmode in self.mapmode_list]
+		self._score_array = None
+		# (mask, map quality, adjusted scores) -> SamplingTable, least recently used first
+		self.sampling_tables = OrderedDict()
+		# Keys sampled once without a cached table
+		self.seen_sampling_keys = set()
+
+	def __getstate__(self):
+		# Sampling tables are rebuilt on demand, no need to send them to worker processes
+		state = dict(self.__dict__)
+		state['_score_array'] = None
+		state['sampling_tables'] = OrderedDict()
+		state['seen_sampling_keys'] = set()
+		return state
+
+	@property
+	def score_array(self):
+		if self._score_array is None:
+			self._score_array = get_numpy().array(self.scores, dtype=float)
+		return self._score_array
+
+	def map_mask(self, map_name):
+		return self.map_masks.get(map_name, 0)
+
+	def mode_mask(self, mode_name):
+		return self.mode_masks.get(mode_name, 0)
+
+	def mapmode_mask(self, mapmode):
+		return self.key_masks.get(mapmode.key, 0)
+
+	def index_array(self, mask):
+		"""indices(mask) as a numpy array, unpacked from the mask's bytes in one call."""
+		np = get_numpy()
+		mask_bytes = mask.to_bytes((len(self.mapmode_list) + 7) // 8, "little")
+		bits = np.unpackbits(np.frombuffer(mask_bytes, dtype=np.uint8), bitorder="little")
+		return np.flatnonzero(bits)
+
+	def indices(self, mask):
+		while mask:
+			low_bit = mask & -mask
+			yield low_bit.bit_length() - 1
+			mask ^= low_bit
+
+
+class MapModePool:
+	__slots__ = ('map_pool_config', '_index', '_mask', '_scores', '_scores_key', '_mapmode_list')
+
+	def __init__(self, mapmode_list, map_pool_config=MapPoolConfig()):
+		self.map_pool_config = map_pool_config
+		self._index = MapModeIndex(mapmode_list, map_pool_config)
+		self._mask = self._index.full_mask
+		# index -> adjusted score, for mapmodes whose likelihood was decreased
+		self._scores = {}
+		# Hashable signature of _scores, built along with it so the sampling table cache doesn't rehash every score
+		self._scores_key = None
+		self._mapmode_list = None
+
+	def _view(self, mask, scores=None, scores_key=None):
+		view = MapModePool.__new__(MapModePool)
+		view.map_pool_config = self.map_pool_config
+		view._index = self._index
+		view._mask = mask
+		if scores is None:
+			view._scores, view._scores_key = self._scores, self._scores_key
+		else:
+			view._scores, view._scores_key = scores, scores_key
+		view._mapmode_list = None
+		return view
+
+	@property
+	def index(self):
+		return self._index
+
+	@property
+	def mask(self):
+		return self._mask
+
+	@property
+	def mapmode_list(self):
+		if self._mapmode_list is None:
+			self._mapmode_list = [self._mapmode_at(i) for i in self._index.indices(self._mask)]
+		return self._mapmode_list
+
+	def _mapmode_at(self, i):
+		mapmode = self._index.mapmode_list[i]
+		if i in self._scores:
+			return MapMode(mode_name=mapmode.mode_name, map_name=mapmode.map_name, score=self._scores[i])
+		return mapmode
+
+	def is_empty(self):
+		return self._mask == 0
+
+	def new_round_context(self):
+		"""An empty RoundContext keeping enough games for min_games_before_repeat_mode."""
+		return RoundContext(max_recent_games=max(DEFAULT_MAX_RECENT_GAMES, self.map_pool_config.min_games_before_repeat_mode))
+
+	def __str__(self):
+		return str(self.mapmode_list)
+
+	def __repr__(self):
+		return repr(self.mapmode_list)
+
+	def filter_exclude_bad_mapmodes(self):
+		return self._view(self._mask & self._index.not_bad_mask)
+
+	def filter_include_okay_mapmodes(self):
+		return self._view(self._mask & self._index.okay_mask)
+
+	def filter_include_good_mapmodes(self):
+		return self._view(self._mask & self._index.good_mask)
+
+	def filter_exclude_map(self, map_name):
+		return self._view(self._mask & ~self._index.map_mask(map_name))
+
+	def filter_include_map(self, map_name):
+		return self._view(self._mask & self._index.map_mask(map_name))
+
+	def filter_exclude_mode(self, mode_name):
+		return self._view(self._mask & ~self._index.mode_mask(mode_name))
+
+	def filter_include_mode(self, mode_name):
+		return self._view(self._mask & self._index.mode_mask(mode_name))
+
+	def filter_limit_maps_per_mode_from_ctx(self, round_ctx):
+		return self._view(self._limit_maps_per_mode_mask(self._mask, round_ctx))
+
+	def _limit_maps_per_mode_mask(self, mask, round_ctx):
+		index = self._index
+		max_maps_per_mode = self.map_pool_config.max_maps_per_mode
+		for mode, game_count in round_ctx.mode_game_counts.items():
+			if game_count >= max_maps_per_mode:
+				used_mask = 0
+				for key in round_ctx.get_used_mapmode_keys(mode, max_maps_per_mode):
+					used_mask |= index.key_masks.get(key, 0)
+				mode_mask = index.mode_mask(mode)
+				mask = (mask & ~mode_mask) | (mask & mode_mask & used_mask)
+		return mask
+
+	def filter_from_ctx(self, round_ctx):
+		"""Narrows the pool to the mapmodes allowed for the next game of round_ctx.
+
+		   Each constraint is applied in turn as a mask intersection, and skipped
+		   if it would leave nothing to pick from.
+		"""
+		index = self._index
+		config = self.map_pool_config
+		tracer = tracing.active_tracer
+		if tracer is None:
+			update_if_nonempty = lambda stage, old, new: new if new else old
+		else:
+			tracer.begin_pick(round_ctx, count_bits(self._mask))
+			def update_if_nonempty(stage, old, new):
+				tracer.record_step(stage, count_bits(old), count_bits(new or old), not new)
+				return new if new else old
+		mask = self._mask & index.not_bad_mask
+		if tracer is not None:
+			tracer.record_step('exclude_bad_mapmodes', count_bits(self._mask), count_bits(mask), False)
+
+		# Limit to max maps per mode
+		mask = update_if_nonempty('max_maps_per_mode', mask, self._limit_maps_per_mode_mask(mask, round_ctx))
+
+		# Don't play same mode before certain num games
+		for mode_name in round_ctx.get_recent_modes(config.min_games_before_repeat_mode):
+			mask = update_if_nonempty('repeat_mode', mask, mask & ~index.mode_mask(mode_name))
+
+		# Can't play same maps as previous round
+		if config.distinct_maps_in_consecutive_rounds:
+			for map_name in round_ctx.previous_round_maps:
+				mask = update_if_nonempty('previous_round_maps', mask, mask & ~index.map_mask(map_name))
+
+		# Can't play map twice in same round
+		for map_name in round_ctx.current_round_maps:
+			mask = update_if_nonempty('current_round_maps', mask, mask & ~index.map_mask(map_name))
+
+		ok_map_count = 0
+		ok_mask = index.okay_mask & self._mask
+		for key, times_played in round_ctx.current_round_keys.items():
+			if index.key_masks.get(key, 0) & ok_mask:
+				ok_map_count += times_played
+		if ok_map_count >= config.max_non_preferred_maps_per_round:
+			mask = update_if_nonempty('preferred_maps_only', mask, mask & index.good_mask)
+
+		scores, scores_key = self._get_adjusted_scores(mask, round_ctx)
+		if tracer is not None:
+			tracer.record_step('decreased_likelihood', count_bits(mask), count_bits(mask), False)
+
+		return self._view(mask, scores, scores_key)
+		
+					
+
+	def with_score_factors(self, score_factors):
+		"""This pool with the score of each (mode, map) key of score_factors multiplied by its factor.
+
+		   Only the likelihood of a mapmode changes. Which mapmodes count as bad or
+		   preferred is still decided by their scores in the map pool.
+		"""
+		index = self._index
+		scores = dict(self._scores)
+		for key, factor in score_factors.items():
+			for i in index.indices(index.key_masks.get(key, 0)):
+				scores[i] = self._scores.get(i, index.scores[i]) * factor
+		return self._view(self._mask, scores, frozenset(scores.items()) if scores else None)
+
+	def get_adjusted_scores(self, mask, round_ctx):
+		"""Index -> score for the mapmodes in mask whose score differs from the map pool's,
+		   after lowering the scores of mapmodes played in the last few rounds.
+		"""
+		return self._get_adjusted_scores(mask, round_ctx)[0]
+
+	def _get_adjusted_scores(self, mask, round_ctx):
+		# The signature of the lowered scores is this pool's signature plus only the scores lowered here
+		if not self.map_pool_config.decreased_past_mapmode_likelihood:
+			return self._scores, self._scores_key
+		index = self._index
+		scores = dict(self._scores)
+		lowered = []
+		for key, rds_ago in round_ctx.get_recently_played(4).items():
+			for i in index.indices(mask & index.key_masks.get(key, 0)):
+				base_score = self._scores.get(i, index.mapmode_list[i].score)
+				scores[i] = base_score * (1.0 - 1.0 / (1.75 * (rds_ago + 1.0) * (rds_ago + 1.0)))
+				lowered.append((i, scores[i]))
+		if not lowered:
+			return self._scores, self._scores_key
+		return scores, (self._scores_key, frozenset(lowered))
+
+	def get_weight(self, i, map_quality=5, scores=None):
+		"""Probability weight of the mapmode at index i, as in MapMode.get_prob_weight."""
+		scores = self._scores if scores is None else scores
+		return (scores.get(i, self._index.scores[i]) / 10.0) ** get_prob_weight_exponent(map_quality)
+
+	def get_choice_probabilities(self, map_quality=5):
+		"""MapMode -> exact probability that random_choice(map_quality) picks it from this pool.
+
+		   Keys are the mapmodes as in the full map pool, with their unadjusted scores.
+		"""
+		expon = get_prob_weight_exponent(map_quality)
+		base_scores = self._index.scores
+		indices = list(self._index.indices(self._mask))
+		weights = [(self._scores.get(i, base_scores[i]) / 10.0) ** expon for i in indices]
+		total = sum(weights)
+		if not indices:
+			return {}
+		if total <= 0:
+			# random_choice falls through to the last mapmode when every weight is 0
+			return {self._index.mapmode_list[indices[-1]]: 1.0}
+		return {self._index.mapmode_list[i]: weight / total for i, weight in zip(indices, weights)}
+
+	def get_next_pick_distribution(self, round_ctx, map_quality=5):
+		"""MapMode -> exact probability that it is the next game picked from this pool for round_ctx,
+		   as filter_from_ctx followed by random_choice would pick it.
+		"""
+		with tracing.trace_generation(None):
+			return self.filter_from_ctx(round_ctx).get_choice_probabilities(map_quality)
+
+	# map quality from 0 to 10. Higher map quality more heavily weights higher scored maps
+	def random_choice(self, map_quality=5, rng=None):
+		"""Picks a mapmode at random, weighted by MapMode.get_prob_weight.
+
+		   rng can be anything with a random() method returning a float in [0, 1),
+		   such as random.Random or numpy.random.Generator. Defaults to the random module.
+		   With the alias_sampling config parameter the pick uses the alias method,
+		   so a seed picks different mapmodes than without it.
+		   The mapmode is returned as in the map pool, with its unadjusted score.
+		"""
+		u = (rng or random).random()
+		table = self.get_sampling_table(map_quality)
+		if self.map_pool_config.alias_sampling:
+			i = table.choose_index_alias(u)
+		else:
+			i = table.choose_index(u)
+		chosen_mapmode = self._index.mapmode_list[i]
+		tracer = tracing.active_tracer
+		if tracer is not None:
+			weights = {str(self._index.mapmode_list[j]): self.get_weight(j, map_quality)
+				for j in self._index.indices(self._mask)} if tracer.record_weights else None
+			tracer.end_pick(chosen_mapmode, weights)
+		return chosen_mapmode
+
+	def get_sampling_table(self, map_quality=5):
+		"""The SamplingTable of this pool, from the index's cache when the same
+		   mapmodes with the same adjusted scores were sampled before.
+		"""
+		mask = self._mask
+		# filter_from_ctx only adjusts scores of mapmodes in the pool, so every adjusted score is part of the key
+		key = (mask, map_quality, self._scores_key)
+		tables = self._index.sampling_tables
+		table = tables.get(key)
+		if table is not None:
+			tables.move_to_end(key)
+			return table
+		if count_bits(mask) >= NUMPY_MIN_POOL_SIZE and get_numpy() is not None:
+			indices, weights = self._get_weights_numpy(map_quality)
+		else:
+			indices, weights = self._get_weights_python(map_quality)
+		table = SamplingTable(indices, weights)
+		# Most filtered pools are only sampled once, so a table is kept from its second use on
+		seen_keys = self._index.seen_sampling_keys
+		if key in seen_keys:
+			tables[key] = table
+			if len(tables) > SAMPLING_TABLE_CACHE_SIZE:
+				tables.popitem(last=False)
+		else:
+			if len(seen_keys) >= SAMPLING_TABLE_CACHE_SIZE:
+				seen_keys.clear()
+			seen_keys.add(key)
+		return table
+
+	def _get_weights_python(self, map_quality):
+		expon = get_prob_weight_exponent(map_quality)
+		base_scores = self._index.scores
+		indices = list(self._index.indices(self._mask))
+		return indices, [(self._scores.get(i, base_scores[i]) / 10.0) ** expon for i in indices]
+
+	def _get_weights_numpy(self, map_quality):
+		np = get_numpy()
+		indices = self._index.index_array(self._mask)
+		scores = self._index.score_array[indices]
+		if self._scores:
+			adjusted = np.fromiter(self._scores.keys(), dtype=np.intp, count=len(self._scores))
+			positions = np.searchsorted(indices, adjusted)
+			in_pool = positions < len(indices)
+			in_pool[in_pool] = indices[positions[in_pool]] == adjusted[in_pool]
+			scores[positions[in_pool]] = np.fromiter(self._scores.values(), dtype=float, count=len(self._scores))[in_pool]
+		return indices, (scores / 10.0) ** get_prob_weight_exponent(map_quality)
+
+
+def to_mapmode_list(map_pool_dict):
+	mapmode_list = []
+	modes = map_pool_dict.get("modes") or []
+	maps = map_pool_dict.get("maps") or {}
+	for mode in modes:
+		mapmodes = maps.get(mode) or []
+		for mapmode in mapmodes:
+			score = mapmode.get("score") or 7
+			map_name = mapmode.get("map_name") or "Final Destination"
+			mapmode_list.append(MapMode(mode_name=mode, map_name=map_name, score=score))
+	return mapmode_list
+
+
+def get_map_pool_by_mode(mapmode_list):
+	mode_to_mapmode_list = defaultdict(list)
+	for mapmode in mapmode_list:
+		mode_to_mapmode_list[mapmode.mode_name].append(mapmode.map_name)
+	return dict(mode_to_mapmode_list)
+
+
+def read_map_pool_from_file(file):
+	import json
+	with open(file) as f:
+		return to_mapmode_list(json.loads(f.read()))	
+
+
+def read_tournament_from_file(file):
+	import json
+	with open(file) as f:
+		return json.loads(f.read())
\ No newline at end of file
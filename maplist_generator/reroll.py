@@ -0,0 +1,199 @@
+import random
+from .mapmode_pool import read_map_pool_from_file, read_tournament_from_file
+from .tournament_gen import COUNTERPICK, CompiledTournament, generate_round, get_game_pool, get_stage_key, \
+	round_to_dict
+
+"""Regenerates chosen rounds of an existing tournament output, keeping every other round as it is.
+
+   The game history each round was generated with is rebuilt by replaying the
+   output's rounds in the order the tournament type generates them, so a
+   rerolled round follows the same rules it would have in a full run. Rounds
+   that are not rerolled keep their output dicts untouched, and come out of
+   json.dumps exactly as they went in.
+"""
+
+
+def get_output_stage_format(output_dict):
+	"""Stage format output_dict was generated with. Only structured output has a schema_version."""
+	return 'structured' if 'schema_version' in output_dict else 'string'
+
+
+def read_round_lists(compiled, plan, output_dict):
+	"""The games of each step of plan, as MapModes of the map pool and COUNTERPICK, read from output_dict."""
+	output_rounds = output_dict.get('rounds', [])
+	if len(output_rounds) != len(plan) or any(output_rounds[step['position']].get('round_name') != step['round_name'] for step in plan):
+		raise RuntimeError('The rounds of the output do not match the tournament config, '
+			'was it generated from a different config?')
+	mapmodes_by_key = {mapmode.key: mapmode for mapmode in compiled.mapmode_pool.index.mapmode_list}
+	round_lists = []
+	for step in plan:
+		round_list = []
+		for stage in output_rounds[step['position']]['stages']:
+			key = get_stage_key(stage)
+			if key is None:
+				round_list.append(COUNTERPICK)
+			elif key in mapmodes_by_key:
+				round_list.append(mapmodes_by_key[key])
+			else:
+				raise RuntimeError(f'{key[0]} on {key[1]} in {step["round_name"]} is not in the map pool')
+		round_lists.append(round_list)
+	return round_lists
+
+
+def replay_round(rd, round_list, round_ctx):
+	"""Appends an already generated round to round_ctx, as generate_round would have."""
+	if rd.get('ignore_game_history'):
+		return
+	for stage in round_list:
+		if stage != COUNTERPICK:
+			round_ctx.append_game(stage)
+	round_ctx.finalize_round()
+
+
+def breaks_constraints(rd, round_list, mapmode_pool, round_ctx):
+	"""Whether any game of round_list is one filter_from_ctx would no longer allow after round_ctx."""
+	if rd.get('ignore_game_history'):
+		return False
+	round_ctx = round_ctx.clone()
+	key_masks = mapmode_pool.index.key_masks
+	for i, stage in enumerate(round_list):
+		if stage == COUNTERPICK:
+			continue
+		allowed_pool = get_game_pool(rd, mapmode_pool, i + 1).filter_from_ctx(round_ctx)
+		if not allowed_pool.mask & key_masks[stage.key]:
+			return True
+		round_ctx.append_game(stage)
+	return False
+
+
+def get_plan_indices(plan, round_names):
+	"""Indices in plan of the generated steps behind round_names."""
+	indices_by_name = {step['round_name']: i for i, step in enumerate(plan)}
+	indices = set()
+	for round_name in round_names:
+		if round_name not in indices_by_name:
+			raise RuntimeError(f'Unknown round {round_name}, the rounds are: '
+				+ ", ".join(step['round_name'] for step in sorted(plan, key=lambda step: step['position'])))
+		i = indices_by_name[round_name]
+		# A round repeating another one is rerolled by rerolling the original
+		indices.add(plan[i].get('same_as', i))
+	return indices
+
+
+def reroll_rounds(mapmode_list, tournament_dict, output_dict, round_names, rng=None, downstream=False, score_factors=None):
+	"""Returns a copy of output_dict, as generated by create_tournament from mapmode_list and
+	   tournament_dict, with the rounds named in round_names generated again.
+
+	   With downstream, later rounds sharing a game history with a rerolled round
+	   are also generated again, but only those with a game the new history no
+	   longer allows, such as a map played in the rerolled round right before.
+	   Rounds repeating a rerolled round, as with share_rounds_w_l, are updated
+	   with it. score_factors is passed on to CompiledTournament, and should be
+	   the ones output_dict was generated with. Returns (new output dict, names
+	   of the rounds generated again).
+	"""
+	rng = rng or random.Random()
+	compiled = CompiledTournament(mapmode_list, tournament_dict, score_factors)
+	if output_dict.get('tournament_type') != compiled.tournament_type:
+		raise RuntimeError(f'Output is a {output_dict.get("tournament_type")} tournament, '
+			f'but the tournament config is {compiled.tournament_type}')
+	plan = compiled.get_plan()
+	round_lists = read_round_lists(compiled, plan, output_dict)
+	targets = get_plan_indices(plan, round_names)
+	mapmode_pool = compiled.mapmode_pool
+	solver = compiled.new_solver()
+	last_target = max(targets)
+
+	contexts = {}
+	# Contexts whose history no longer matches the output
+	changed_contexts = set()
+	rerolled = set()
+	for i, step in enumerate(plan):
+		if 'same_as' in step:
+			if step['same_as'] in rerolled:
+				round_lists[i] = round_lists[step['same_as']]
+				rerolled.add(i)
+			continue
+		if i > last_target and not changed_contexts:
+			# Nothing after this can change, only rounds repeating a rerolled one are left to update
+			continue
+		round_ctx = contexts.setdefault(step['context'], mapmode_pool.new_round_context())
+		if i in targets or (downstream and step['context'] in changed_contexts
+			and breaks_constraints(step['rd'], round_lists[i], mapmode_pool, round_ctx)):
+			round_lists[i] = generate_round(step['rd'], mapmode_pool, round_ctx, rng, solver)
+			rerolled.add(i)
+			if downstream and not step['rd'].get('ignore_game_history'):
+				changed_contexts.add(step['context'])
+		else:
+			replay_round(step['rd'], round_lists[i], round_ctx)
+		if step.get('fork'):
+			contexts[step['fork']] = round_ctx.clone()
+			if step['context'] in changed_contexts:
+				changed_contexts.add(step['fork'])
+
+	stage_format = get_output_stage_format(output_dict)
+	output_rounds = list(output_dict['rounds'])
+	for i in sorted(rerolled):
+		output_rounds[plan[i]['position']] = round_to_dict(plan[i]['round_name'], round_lists[i], solver, stage_format)
+	rerolled_names = [plan[i]['round_name'] for i in sorted(rerolled, key=lambda i: plan[i]['position'])]
+	return {**output_dict, 'rounds': output_rounds}, rerolled_names
+
+
+def build_parser():
+	import argparse
+	parser = argparse.ArgumentParser(description='Regenerate some rounds of a tournament maplist, keeping the others.')
+	parser.add_argument('input_file', help="Tournament JSON output by tournament_gen.py.")
+
+	parser.add_argument('-t', '--tournament_file', '--tournament', required=True,
+		help="Tournament config the maplist was generated from.")
+
+	parser.add_argument('-m', '--map_pool_file', '--map_pool', required=True,
+		help="Map pool the maplist was generated from.")
+
+	parser.add_argument('-r', '--rounds', nargs='+', required=True,
+		help="Names of the rounds to regenerate, as in the output, e.g. 'Losers Semifinals'.")
+
+	parser.add_argument('-d', '--downstream', action='store_true',
+		help="Also regenerate later rounds that break a rule because of the new rounds, such as replaying a map from the round before.")
+
+	parser.add_argument('-s', '--seed', type=int,
+		default=None, help="Seed for the random generator. Runs with the same seed and inputs produce the same rounds.")
+
+	parser.add_argument('-o', '--output_file', '--output',
+		default=None, help="Write the updated maplist to this file. Can be the input file. Otherwise it is only printed.")
+
+	from .history_store import add_history_arguments
+	add_history_arguments(parser, record=False)
+	return parser
+
+
+def main(argv=None):
+	import json
+	parsed_args = build_parser().parse_args(argv)
+
+	seed = parsed_args.seed if parsed_args.seed is not None else random.SystemRandom().getrandbits(32)
+	print(f"Using seed {seed}")
+	with open(parsed_args.input_file, encoding="utf-8") as f:
+		output_dict = json.load(f)
+	mapmode_list = read_map_pool_from_file(parsed_args.map_pool_file)
+	tournament_dict = read_tournament_from_file(parsed_args.tournament_file)
+	score_factors = None
+	if parsed_args.series:
+		from .history_store import HistoryStore, get_tournament_score_factors
+		with HistoryStore(parsed_args.history_db) as history_store:
+			score_factors = get_tournament_score_factors(history_store, parsed_args.series, mapmode_list, tournament_dict)
+
+	output_dict, rerolled_names = reroll_rounds(mapmode_list, tournament_dict, output_dict,
+		parsed_args.rounds, random.Random(seed), parsed_args.downstream, score_factors)
+	print(f"Regenerated {', '.join(rerolled_names)}")
+	output_json_str = json.dumps(output_dict, indent=4)
+	if parsed_args.output_file:
+		with open(parsed_args.output_file, "w+") as f:
+			f.write(output_json_str)
+		print(f"Written to {parsed_args.output_file}")
+	else:
+		print(output_json_str)
+
+
+if __name__ == "__main__":
+	main()
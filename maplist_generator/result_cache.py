@@ -0,0 +1,158 @@
+import hashlib
+import os
+import random
+from .maplist_gen import create_continuous_maplist
+from .tournament_gen import create_tournament
+
+"""On-disk cache of generated maplists, keyed by a hash of everything that decides the output.
+
+   Generation is deterministic for a given map pool, config and seed, so a
+   result can be stored under the sha256 of those inputs and returned as is the
+   next time they are asked for. Entries are zlib compressed compact JSON, one
+   file each. A hit refreshes the entry's modification time, and once the cache
+   grows past max_bytes the least recently used entries are deleted.
+"""
+
+# Bump when a change to generation means cached results are no longer what it would output
+CACHE_VERSION = 2
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+CACHE_SUFFIX = ".json.z"
+
+
+def get_default_cache_dir():
+	"""$MAPLIST_CACHE_DIR, or maplist_generator in the user's cache directory."""
+	if os.environ.get('MAPLIST_CACHE_DIR'):
+		return os.environ['MAPLIST_CACHE_DIR']
+	base_dir = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser("~"), ".cache")
+	return os.path.join(base_dir, "maplist_generator")
+
+
+def get_cache_key(kind, mapmode_list, params):
+	"""sha256 of the normalized inputs. The map pool keeps its order, since that decides which mapmode a seed picks."""
+	import json
+	normalized = {
+		'version': CACHE_VERSION,
+		'kind': kind,
+		'map_pool': [[mapmode.mode_name, mapmode.map_name, mapmode.score] for mapmode in mapmode_list],
+		'params': params,
+	}
+	data = json.dumps(normalized, sort_keys=True, separators=(',', ':'))
+	return hashlib.sha256(data.encode('utf-8')).hexdigest()
+
+
+class ResultCache:
+	def __init__(self, cache_dir=None, max_bytes=DEFAULT_MAX_BYTES):
+		self.cache_dir = cache_dir or get_default_cache_dir()
+		self.max_bytes = max_bytes
+
+	def get_path(self, key):
+		return os.path.join(self.cache_dir, key + CACHE_SUFFIX)
+
+	def get(self, key):
+		"""The cached value for key, or None."""
+		import json
+		import zlib
+		path = self.get_path(key)
+		try:
+			with open(path, "rb") as f:
+				data = f.read()
+			os.utime(path)
+		except OSError:
+			return None
+		try:
+			return json.loads(zlib.decompress(data).decode('utf-8'))
+		except (zlib.error, ValueError):
+			# Damaged entry, regenerate it
+			return None
+
+	def put(self, key, value):
+		import json
+		import zlib
+		os.makedirs(self.cache_dir, exist_ok=True)
+		path = self.get_path(key)
+		tmp_path = f"{path}.{os.getpid()}.tmp"
+		data = zlib.compress(json.dumps(value, separators=(',', ':')).encode('utf-8'))
+		with open(tmp_path, "wb") as f:
+			f.write(data)
+		os.replace(tmp_path, path)
+		self.evict()
+
+	def get_or_create(self, key, create):
+		value = self.get(key)
+		if value is None:
+			value = create()
+			self.put(key, value)
+		return value
+
+	def get_entries(self):
+		"""[(modification time, size, path)] of every entry, least recently used first."""
+		entries = []
+		try:
+			with os.scandir(self.cache_dir) as it:
+				for entry in it:
+					if entry.name.endswith(CACHE_SUFFIX):
+						stat = entry.stat()
+						entries.append((stat.st_mtime_ns, stat.st_size, entry.path))
+		except FileNotFoundError:
+			pass
+		entries.sort()
+		return entries
+
+	def evict(self):
+		"""Deletes least recently used entries until the cache is at most max_bytes."""
+		entries = self.get_entries()
+		total = sum(size for _, size, _ in entries)
+		for _, size, path in entries:
+			if total <= self.max_bytes:
+				break
+			try:
+				os.remove(path)
+			except FileNotFoundError:
+				pass
+			total -= size
+
+	def purge(self):
+		"""Deletes every entry. Returns the number deleted."""
+		entries = self.get_entries()
+		for _, _, path in entries:
+			try:
+				os.remove(path)
+			except FileNotFoundError:
+				pass
+		return len(entries)
+
+	def create_tournament(self, mapmode_list, tournament_dict, seed, stage_format='structured', workers=1):
+		"""create_tournament(mapmode_list, tournament_dict, random.Random(seed), stage_format, workers=workers), cached.
+
+		   stage_format='mapmode' output can't be stored and is always generated.
+		   workers doesn't change the output, so it is not part of the key.
+		"""
+		create = lambda: create_tournament(mapmode_list, tournament_dict, random.Random(seed), stage_format, workers=workers)
+		if stage_format == 'mapmode':
+			return create()
+		key = get_cache_key('tournament', mapmode_list, {'tournament': tournament_dict, 'seed': seed, 'stage_format': stage_format})
+		return self.get_or_create(key, create)
+
+	def create_continuous_maplist(self, mapmode_list, num_games, map_quality, seed):
+		"""create_continuous_maplist(mapmode_list, num_games, map_quality, random.Random(seed)), cached."""
+		key = get_cache_key('maplist', mapmode_list, {'num_games': num_games, 'map_quality': map_quality, 'seed': seed})
+		return self.get_or_create(key, lambda: create_continuous_maplist(mapmode_list, num_games, map_quality, random.Random(seed)))
+
+
+def add_cache_arguments(parser):
+	parser.add_argument('--no_cache', action='store_true',
+		help="Always generate, without reading or writing the result cache. Results are only cached for runs with a --seed.")
+
+	parser.add_argument('--purge_cache', action='store_true',
+		help="Delete every cached result before running.")
+
+	parser.add_argument('--cache_dir', default=None,
+		help="Directory of the result cache. Defaults to $MAPLIST_CACHE_DIR or ~/.cache/maplist_generator.")
+
+
+def get_cache_from_args(parsed_args, out=None):
+	"""The ResultCache selected by add_cache_arguments' flags, or None with --no_cache. Purges it first if asked."""
+	cache = ResultCache(parsed_args.cache_dir)
+	if parsed_args.purge_cache:
+		print(f"Deleted {cache.purge()} cached results from {cache.cache_dir}", file=out)
+	return None if parsed_args.no_cache else cache
@@ -0,0 +1,223 @@
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import random
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from .mapmode_pool import read_map_pool_from_file
+from .tournament_gen import CompiledTournament
+from .maplist_gen import create_continuous_maplist
+
+"""Long-running generation server.
+
+   Serves JSON-RPC 2.0 over HTTP (POST to /) so bots and web panels can generate
+   maplists without starting a new Python process per request. Generation runs
+   in a pool of worker processes. Each worker keeps the map pools it has read
+   and the tournaments it has compiled in an LRU cache, keyed by file path and
+   modification time, so a changed file is picked up on the next request.
+
+   Methods:
+     create_tournament  {map_pool_file, tournament_file | tournament, seed?, stage_format?}
+     create_maplist     {map_pool_file, num_games?, map_quality?, seed?}
+     ping               {}
+"""
+
+
+class LRUCache:
+	def __init__(self, max_size):
+		self.max_size = max_size
+		self._entries = OrderedDict()
+
+	def get_or_create(self, key, create):
+		if key in self._entries:
+			self._entries.move_to_end(key)
+			return self._entries[key]
+		value = create()
+		self._entries[key] = value
+		if len(self._entries) > self.max_size:
+			self._entries.popitem(last=False)
+		return value
+
+
+# Per worker process caches, created by _init_worker
+_map_pool_cache = None
+_tournament_cache = None
+
+
+def _init_worker(cache_size):
+	global _map_pool_cache, _tournament_cache
+	_map_pool_cache = LRUCache(cache_size)
+	_tournament_cache = LRUCache(cache_size)
+
+
+def get_file_key(path):
+	"""(absolute path, modification time) of a file, the cache key for its contents."""
+	path = os.path.realpath(path)
+	return path, os.stat(path).st_mtime_ns
+
+
+def _get_mapmode_list(map_pool_key):
+	return _map_pool_cache.get_or_create(map_pool_key, lambda: read_map_pool_from_file(map_pool_key[0]))
+
+
+def _read_json_file(path):
+	with open(path) as f:
+		return json.loads(f.read())
+
+
+def _create_tournament(map_pool_key, tournament_key, tournament_dict, seed, stage_format):
+	# tournament_key is a file key, or a hash of a tournament sent with the request
+	def compile_tournament():
+		tournament = tournament_dict if tournament_dict is not None else _read_json_file(tournament_key[0])
+		return CompiledTournament(_get_mapmode_list(map_pool_key), tournament)
+	compiled = _tournament_cache.get_or_create((map_pool_key, tournament_key), compile_tournament)
+	return compiled.generate(random.Random(seed), stage_format)
+
+
+def _create_maplist(map_pool_key, num_games, map_quality, seed):
+	return create_continuous_maplist(_get_mapmode_list(map_pool_key), num_games, map_quality, random.Random(seed))
+
+
+class JsonRpcError(Exception):
+	def __init__(self, code, message):
+		super().__init__(message)
+		self.code = code
+		self.message = message
+
+
+def get_param(params, name):
+	if name not in params:
+		raise JsonRpcError(-32602, f'Missing parameter {name}')
+	return params[name]
+
+
+async def write_response(writer, status, response, keep_alive):
+	response_body = json.dumps(response).encode('utf-8')
+	writer.write((f"HTTP/1.1 {status}\r\nContent-Type: application/json\r\n"
+		f"Content-Length: {len(response_body)}\r\n"
+		f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n").encode('latin-1') + response_body)
+	await writer.drain()
+
+
+class GenerationServer:
+	def __init__(self, workers=None, cache_size=32):
+		self.executor = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(cache_size,))
+
+	async def run_in_worker(self, func, *args):
+		return await asyncio.get_running_loop().run_in_executor(self.executor, func, *args)
+
+	async def call(self, method, params):
+		if not isinstance(params, dict):
+			raise JsonRpcError(-32602, 'params must be an object')
+		seed = params.get('seed')
+		if seed is None:
+			seed = random.SystemRandom().getrandbits(32)
+		try:
+			if method == 'ping':
+				return 'pong'
+			elif method == 'create_tournament':
+				map_pool_key = get_file_key(get_param(params, 'map_pool_file'))
+				tournament_dict = params.get('tournament')
+				if tournament_dict is not None:
+					tournament_key = ('inline', hashlib.sha256(json.dumps(tournament_dict, sort_keys=True).encode('utf-8')).hexdigest())
+				else:
+					tournament_key = get_file_key(get_param(params, 'tournament_file'))
+				stage_format = params.get('stage_format', 'structured')
+				if stage_format not in ['structured', 'string']:
+					raise JsonRpcError(-32602, f'stage_format must be structured or string, not {stage_format}')
+				result = await self.run_in_worker(_create_tournament, map_pool_key, tournament_key, tournament_dict, seed, stage_format)
+			elif method == 'create_maplist':
+				map_pool_key = get_file_key(get_param(params, 'map_pool_file'))
+				result = await self.run_in_worker(_create_maplist, map_pool_key,
+					int(params.get('num_games', 7)), int(params.get('map_quality', 5)), seed)
+			else:
+				raise JsonRpcError(-32601, f'Method not found: {method}')
+		except JsonRpcError:
+			raise
+		except (OSError, ValueError, RuntimeError) as e:
+			raise JsonRpcError(-32000, str(e))
+		except Exception as e:
+			# Anything else is a bug or a malformed config, but the client still gets an answer
+			raise JsonRpcError(-32603, f'Internal error: {type(e).__name__}: {e}')
+		return {'seed': seed, 'result': result}
+
+	async def handle_rpc(self, body):
+		try:
+			request = json.loads(body)
+		except ValueError:
+			return {'jsonrpc': '2.0', 'id': None, 'error': {'code': -32700, 'message': 'Parse error'}}
+		request_id = request.get('id') if isinstance(request, dict) else None
+		try:
+			if not isinstance(request, dict) or 'method' not in request:
+				raise JsonRpcError(-32600, 'Invalid Request')
+			result = await self.call(request['method'], request.get('params', {}))
+			return {'jsonrpc': '2.0', 'id': request_id, 'result': result}
+		except JsonRpcError as e:
+			return {'jsonrpc': '2.0', 'id': request_id, 'error': {'code': e.code, 'message': e.message}}
+
+	async def handle_connection(self, reader, writer):
+		try:
+			while True:
+				request_line = await reader.readline()
+				if not request_line:
+					break
+				try:
+					method, path, version = request_line.decode('latin-1').split(' ', 2)
+					headers = {}
+					while True:
+						line = await reader.readline()
+						if line in (b'\r\n', b'\n', b''):
+							break
+						name, _, value = line.decode('latin-1').partition(':')
+						headers[name.strip().lower()] = value.strip()
+					body = await reader.readexactly(int(headers.get('content-length', 0)))
+				except ValueError:
+					# A malformed request line or Content-Length, the rest of the stream can't be trusted
+					await write_response(writer, '400 Bad Request', {'error': 'bad request'}, False)
+					break
+
+				if method == 'POST' and path in ('/', '/rpc'):
+					status, response = '200 OK', await self.handle_rpc(body)
+				elif method == 'GET' and path == '/health':
+					status, response = '200 OK', {'status': 'ok'}
+				else:
+					status, response = '404 Not Found', {'error': 'not found'}
+				keep_alive = headers.get('connection', '').lower() != 'close' and version.strip() == 'HTTP/1.1'
+				await write_response(writer, status, response, keep_alive)
+				if not keep_alive:
+					break
+		except (asyncio.IncompleteReadError, ConnectionError):
+			pass
+		finally:
+			writer.close()
+
+	async def serve(self, host, port):
+		server = await asyncio.start_server(self.handle_connection, host, port)
+		print(f"Serving on http://{host}:{port}")
+		async with server:
+			await server.serve_forever()
+
+
+def main(argv=None):
+	parser = argparse.ArgumentParser(description='Serve maplist generation over HTTP JSON-RPC.')
+	parser.add_argument('--host', default='127.0.0.1', help="Address to listen on. Default 127.0.0.1.")
+	parser.add_argument('-p', '--port', type=int, default=8080, help="Port to listen on. Default 8080.")
+	parser.add_argument('-w', '--workers', type=int, default=None,
+		help="Number of generation worker processes. Default one per CPU core.")
+	parser.add_argument('--cache_size', type=int, default=32,
+		help="Map pools and compiled tournaments kept warm per worker. Default 32.")
+	args = parser.parse_args(argv)
+
+	server = GenerationServer(args.workers, args.cache_size)
+	try:
+		asyncio.run(server.serve(args.host, args.port))
+	except KeyboardInterrupt:
+		pass
+	finally:
+		server.executor.shutdown()
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,687 @@
+import random
+import os
+from .constraint_solver import RoundSolver, SolverTables
+from .tracing import GenerationTracer, trace_generation
+from .mapmode_pool import MapMode, MapModePool, MapPoolConfig, \
+	to_mapmode_list, get_map_pool_by_mode, read_map_pool_from_file, read_tournament_from_file
+import math 
+
+"""Generates a Tournament Maplist based on a tournament configuration and a map pool.
+   
+   author: bjackson8bit
+"""
+
+example_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.realpath(__file__))), "examples/")
+ex_map_pool = os.path.join(example_dir, "example_map_pool.json")
+ex_tournament = os.path.join(example_dir, "example_tournament.json")
+
+def build_parser():
+	import argparse
+	parser = argparse.ArgumentParser(description='Create a maplist from a tournament configuration and map pool.')
+	parser.add_argument('-t', '--tournament_file', '--tournament_cfg', '--tournament', '--tournament_config', '--tourney', '--tourney_config', 
+		default=ex_tournament, help='Generate a maplist using a custom json tournament config file.')
+
+	parser.add_argument('-m', '--map_pool_file', '--map_pool', '--map_pool_config', '--mappool_config', 
+		default=ex_map_pool, help="Generate a maplist using a custom json map pool config file.")
+
+	parser.add_argument('-o', '--output_file', '--output' '--output_rounds',
+		default=None, help="Outputs Tourney rounds and used map pool as a JSON to the specified file. Creates it if it does not exist.")
+
+	parser.add_argument('-s', '--seed', type=int,
+		default=None, help="Seed for the random generator. Runs with the same seed and inputs produce the same maplist.")
+
+	parser.add_argument('-k', '--candidates', type=int,
+		default=1, help="Generate this many candidate maplists and output the best scoring one. Default 1.")
+
+	parser.add_argument('-w', '--workers', type=int,
+		default=1, help="Number of processes used to generate candidates, or the pods of a swiss or round robin tournament. 0 uses one per CPU core. Default 1.")
+
+	parser.add_argument('--profile', nargs='?', const='', default=None, metavar='TRACE_FILE',
+		help="Print per-stage timings, pool sizes and constraint fallbacks of every pick. If TRACE_FILE is given, also write each pick to it as JSON lines.")
+
+	parser.add_argument('-e', '--engine', choices=['greedy', 'solver'],
+		default=None, help="'greedy' picks games one at a time, skipping rules that can't be met. 'solver' plans each round with backtracking and reports rules it had to relax. Overrides the tournament file's engine setting.")
+
+	parser.add_argument('-x', '--export', '--export_dir', default=None, metavar='EXPORT_DIR',
+		help="Also write the maplist as IPL JSON, EGTV CSV and Discord messages to this directory, straight from the generated rounds.")
+
+	parser.add_argument('--legacy_stages', action='store_true',
+		help="Output each stage as a \"Mode on Map\" string, as before schema version 2, instead of a {type, mode, map, score} record.")
+
+	from .result_cache import add_cache_arguments
+	add_cache_arguments(parser)
+
+	from .history_store import add_history_arguments
+	add_history_arguments(parser)
+	return parser
+
+
+COUNTERPICK = "Counterpick"
+
+# How round_to_dict outputs stages.
+#   'structured' {'type': 'game', 'mode', 'map', 'score'} records, and {'type': 'counterpick'}
+#   'string'     the legacy "Mode on Map" and "Counterpick" strings
+#   'mapmode'    the MapMode objects themselves, for in-process consumers such as
+#                export.export_tournament. Not JSON serializable.
+STAGE_FORMATS = ['structured', 'string', 'mapmode']
+
+# schema_version of tournament output with structured stages. Output with string
+# stages has no schema_version and is version 1.
+OUTPUT_SCHEMA_VERSION = 2
+
+
+def stage_to_output(stage, stage_format):
+	if stage_format == 'mapmode':
+		return stage
+	if stage_format == 'string':
+		return str(stage)
+	if stage == COUNTERPICK:
+		return {'type': 'counterpick'}
+	return {'type': 'game', 'mode': stage.mode_name, 'map': stage.map_name, 'score': stage.score}
+
+
+def get_stage_key(stage):
+	"""(mode, map) of a stage in any stage format, or None for a counterpick."""
+	if isinstance(stage, MapMode):
+		return stage.key
+	if isinstance(stage, dict):
+		return None if stage.get('type') == 'counterpick' else (stage['mode'], stage['map'])
+	if stage == COUNTERPICK:
+		return None
+	mode_name, map_name = stage.split(" on ", 1)
+	return mode_name, map_name
+
+
+def round_to_dict(rd_name, mapmode_list, solver=None, stage_format='structured'):
+	rd_dict = {
+		'round_name': rd_name,
+		'num_games': len(mapmode_list),
+		'stages': [stage_to_output(mm, stage_format) for mm in mapmode_list]
+	}
+	relaxed = solver.get_relaxed_constraints(mapmode_list) if solver else []
+	if relaxed:
+		rd_dict['relaxed_constraints'] = relaxed
+	return rd_dict
+
+
+def get_game_pool(rd, mapmode_pool, game_num):
+	"""The pool game_num (starting at 1) of a round picks from, after its game override if any."""
+	overrides = rd.get('game_overrides')
+	if overrides:
+		override = next((o for o in overrides if o.get('game_num') == game_num), None)
+		if override:
+			limited_mapmode_pool = mapmode_pool.filter_include_mode(override.get('mode')) \
+				if override.get('mode') else mapmode_pool
+			return limited_mapmode_pool.filter_include_map(override.get('map')) \
+				if override.get('map') else limited_mapmode_pool
+	return mapmode_pool
+
+
+def get_map_quality(rd):
+	map_quality_str = rd.get('map_quality') or "normal"
+	return 7 if map_quality_str == "high" else 8 if map_quality_str == "very high" else 5
+
+
+def generate_round(rd, mapmode_pool, round_ctx, rng=None, solver=None):
+	"""Generates one round and appends it to round_ctx.
+
+	   Games are picked one at a time, unless a RoundSolver is given to plan the whole round.
+	"""
+	rng = rng or random.Random()
+	if rd.get("ignore_game_history"):
+		round_ctx = mapmode_pool.new_round_context()
+	num_games = 1 if rd.get('counterpicks') else (rd.get('num_games') or 3)
+	map_quality = get_map_quality(rd)
+	relaxed = []
+
+	if solver:
+		game_masks = [get_game_pool(rd, mapmode_pool, i + 1).mask for i in range(num_games)]
+		chosen_mapmodes, relaxed = solver.plan_round(mapmode_pool, round_ctx, game_masks, map_quality, rng)
+		for chosen_mapmode in chosen_mapmodes:
+			round_ctx.append_game(chosen_mapmode)
+	else:
+		for i in range(num_games):
+			filtered_pool = get_game_pool(rd, mapmode_pool, i + 1).filter_from_ctx(round_ctx)
+			chosen_mapmode = filtered_pool.random_choice(map_quality, rng)
+			round_ctx.append_game(chosen_mapmode)
+	round_final = round_ctx.current_round
+	if rd.get('counterpicks'):
+		round_final = round_final + [COUNTERPICK] * ((rd.get('num_games') or 3) - 1)
+	round_ctx.finalize_round()
+	if solver:
+		solver.record_round(round_final, relaxed)
+	return round_final
+
+# Each tournament type describes its rounds as a plan, a list of steps in the order
+# they are generated. A step is a dict of
+#   'round_name'  name of the round in the output
+#   'position'    index of the round in the output rounds
+#   'rd'          round config, passed to generate_round
+#   'context'     name of the RoundContext the round is generated with. Rounds
+#                 sharing a context see each other's games in their history.
+#   'fork'        optional, name of a new context copied from this one after the round
+#   'same_as'     instead of 'rd' and 'context', the index in the plan of an
+#                 earlier step whose games this round repeats
+def generate_planned_round_lists(compiled, plan, rng, solver=None):
+	"""Generates every step of plan. Returns the list of games of each step."""
+	contexts = {}
+	round_lists = []
+	for step in plan:
+		if 'same_as' in step:
+			round_lists.append(round_lists[step['same_as']])
+			continue
+		round_ctx = contexts.setdefault(step['context'], compiled.mapmode_pool.new_round_context())
+		round_lists.append(generate_round(step['rd'], compiled.mapmode_pool, round_ctx, rng, solver))
+		if step.get('fork'):
+			contexts[step['fork']] = round_ctx.clone()
+	return round_lists
+
+
+def planned_rounds_to_dicts(plan, round_lists, solver=None, stage_format='structured'):
+	"""Output rounds of a plan, in output order."""
+	output_rounds = [None] * len(plan)
+	for step, round_list in zip(plan, round_lists):
+		output_rounds[step['position']] = round_to_dict(step['round_name'], round_list, solver, stage_format)
+	return output_rounds
+
+
+def generate_planned_rounds(compiled, plan, rng, solver=None, stage_format='structured'):
+	return planned_rounds_to_dicts(plan, generate_planned_round_lists(compiled, plan, rng, solver), solver, stage_format)
+
+
+class CompiledTournament:
+	"""A tournament config parsed once, with its map pool built, ready to generate brackets from.
+
+	   Generating several brackets from the same config should reuse one of these
+	   instead of going through create_tournament each time.
+	"""
+	def __init__(self, mapmode_list, tournament_dict, score_factors=None):
+		"""score_factors optionally maps (mode, map) keys to factors their scores
+		   are lowered by, such as history_store.HistoryStore.get_score_factors.
+		   Like the recent rounds penalty, they are only applied with
+		   decreased_past_mapmode_likelihood.
+		"""
+		if 'tournament_type' not in tournament_dict:
+			raise RuntimeError('Key tournament_type not present in input file')
+		elif 'tournament_config' not in tournament_dict:
+			raise RuntimeError('Key tournament_config not present in input file')
+
+		tournament_type = tournament_dict.get('tournament_type')
+		if tournament_type == 'rounds':
+			self.tournament_type = 'rounds'
+		elif tournament_type in ['double elim', 'double_elim', 'double elimination', 'double_elimination']:
+			self.tournament_type = 'double_elim'
+		elif tournament_type in ['bracket', 'single elim', 'single_elim', 'single elimination', 'single_elimination']:
+			self.tournament_type = 'single_elim'
+		elif tournament_type in ['swiss', 'swiss system', 'swiss_system']:
+			self.tournament_type = 'swiss'
+		elif tournament_type in ['round robin', 'round_robin', 'groups']:
+			self.tournament_type = 'round_robin'
+		else:
+			raise RuntimeError(f'Unknown tournament_type {tournament_type}')
+
+		self.num_players = 16
+		self.num_pods = 1
+		self.num_rounds = None
+		self.rounds = []
+		self.round_cfg = {}
+		self.engine = 'greedy'
+		self.solver_time_budget = 1.0
+		map_pool_params = {}
+		for k, v in tournament_dict.get('tournament_config').items():
+			if k == 'rounds':
+				self.rounds = v
+			elif k == 'round_config':
+				self.round_cfg = v
+			elif k == 'num_players':
+				self.num_players = v
+			elif k == 'num_pods':
+				self.num_pods = v
+			elif k == 'num_rounds':
+				self.num_rounds = v
+			elif k == 'engine':
+				self.engine = v
+			elif k == 'solver_time_budget':
+				self.solver_time_budget = v
+			else:
+				map_pool_params[k] = v
+		self.map_pool_config = MapPoolConfig.from_dict(map_pool_params)
+		if self.engine not in ['greedy', 'solver']:
+			raise RuntimeError(f'Unknown engine {self.engine}')
+		self.mapmode_pool = MapModePool(mapmode_list, self.map_pool_config)
+		if score_factors and self.map_pool_config.decreased_past_mapmode_likelihood:
+			self.mapmode_pool = self.mapmode_pool.with_score_factors(score_factors)
+		self.used_map_pool = get_map_pool_by_mode(self.mapmode_pool.filter_exclude_bad_mapmodes().mapmode_list)
+		self.solver_tables = SolverTables(self.mapmode_pool) if self.engine == 'solver' else None
+
+	def new_solver(self):
+		if self.solver_tables is None:
+			return None
+		return RoundSolver(self.solver_tables, self.map_pool_config, self.solver_time_budget)
+
+	def get_plan(self):
+		"""Steps generating this tournament's rounds, see generate_planned_round_lists."""
+		if self.tournament_type == 'rounds':
+			return get_rounds_plan(self)
+		elif self.tournament_type == 'double_elim':
+			return get_double_elim_plan(self)
+		elif self.tournament_type in POD_TOURNAMENT_TYPES:
+			return get_pods_plan(self)
+		return get_single_elim_plan(self)
+
+	def generate(self, rng=None, stage_format='structured', workers=1):
+		"""workers is the number of processes the pods of swiss and round robin
+		   tournaments, or the winners and losers branches of a double elimination
+		   tournament with independent_branches, are spread over. The output does
+		   not depend on it.
+		"""
+		if stage_format not in STAGE_FORMATS:
+			raise RuntimeError(f'Unknown stage_format {stage_format}')
+		rng = rng or random.Random()
+		solver = self.new_solver()
+		if self.tournament_type == 'rounds':
+			output_dict = generate_rounds_tournament(self, rng, solver, stage_format)
+		elif self.tournament_type == 'double_elim':
+			output_dict = generate_double_elim_tournament(self, rng, solver, stage_format, workers)
+		elif self.tournament_type in POD_TOURNAMENT_TYPES:
+			output_dict = generate_pods_tournament(self, rng, stage_format, workers)
+		else:
+			output_dict = generate_single_elim_tournament(self, rng, solver, stage_format)
+		if stage_format == 'structured':
+			output_dict = {'schema_version': OUTPUT_SCHEMA_VERSION, **output_dict}
+		return output_dict
+
+
+def create_rounds_tournament(mapmode_list, tournament_dict, rng=None):
+	return CompiledTournament(mapmode_list, {'tournament_type': 'rounds', 'tournament_config': tournament_dict}).generate(rng)
+
+
+def get_rounds_plan(compiled):
+	return [{'round_name': f"Round {i + 1}", 'rd': rd, 'context': 'main', 'position': i}
+		for i, rd in enumerate(compiled.rounds)]
+
+
+def generate_rounds_tournament(compiled, rng, solver=None, stage_format='structured'):
+	output_dict = {
+		'tournament_type': 'rounds',
+		'map_pool': compiled.used_map_pool,
+		'rounds': generate_planned_rounds(compiled, get_rounds_plan(compiled), rng, solver, stage_format)
+	}
+	
+	return output_dict
+
+
+# excludes grands
+def get_number_winners_rounds(num_players):
+	return math.ceil(math.log(num_players, 2))
+
+
+# excludes grands
+def get_number_losers_rounds(num_players):
+	return (get_number_winners_rounds(num_players) - 1) * 2 - 1
+
+
+def get_round_name(rd_num, num_rounds):
+	if rd_num == num_rounds - 3:
+		return "Quarterfinals"
+	elif rd_num == num_rounds - 2:
+		return "Semifinals"
+	elif rd_num == num_rounds - 1:
+		return "Finals"
+	else:
+		return f"Round {rd_num+1}"
+
+
+def create_single_elim_tournament(mapmode_list, tournament_dict, rng=None):
+	return CompiledTournament(mapmode_list, {'tournament_type': 'single_elim', 'tournament_config': tournament_dict}).generate(rng)
+
+
+def get_single_elim_plan(compiled):
+	round_cfg = compiled.round_cfg
+	num_winners_rounds = get_number_winners_rounds(compiled.num_players)
+	plan = []
+	for i in range(num_winners_rounds):
+		if i == num_winners_rounds - 3 and 'quarterfinals' in round_cfg:
+			rd = round_cfg.get('quarterfinals')
+		elif i == num_winners_rounds - 2 and 'semifinals' in round_cfg:
+			rd = round_cfg.get('semifinals')
+		elif i == num_winners_rounds - 1 and 'finals' in round_cfg:
+			rd = round_cfg.get('finals')
+		else:
+			rd = round_cfg.get('default')
+		plan.append({'round_name': get_round_name(i, num_winners_rounds), 'rd': rd, 'context': 'main', 'position': i})
+	return plan
+
+
+def generate_single_elim_tournament(compiled, rng, solver=None, stage_format='structured'):
+	output_dict = {
+		'tournament_type': 'single_elim',
+		'num_players': compiled.num_players,
+		'map_pool': compiled.used_map_pool,
+		'rounds': generate_planned_rounds(compiled, get_single_elim_plan(compiled), rng, solver, stage_format)
+	}
+	
+	return output_dict
+
+
+def create_double_elim_tournament(mapmode_list, tournament_dict, rng=None):
+	return CompiledTournament(mapmode_list, {'tournament_type': 'double_elim', 'tournament_config': tournament_dict}).generate(rng)
+
+
+def get_double_elim_plan(compiled):
+	"""Winners round 1 and the losers rounds share one game history. The other
+	   winners rounds and grand finals continue from a copy of it taken after
+	   winners round 1.
+	"""
+	num_players = compiled.num_players
+	round_cfg = compiled.round_cfg
+	num_winners_rounds = get_number_winners_rounds(num_players)
+	num_losers_rounds = get_number_losers_rounds(num_players)
+	winners_name = lambda i: f"Winners {get_round_name(i, num_winners_rounds)}"
+
+	# Generate wr1
+	plan = [{'round_name': winners_name(0), 'rd': round_cfg.get('default'), 'context': 'main', 'position': 0, 'fork': 'winners'}]
+
+	# Generate losers rounds
+	for rd_num in range(num_losers_rounds):
+		if rd_num == num_losers_rounds - 2 and 'l_semifinals' in round_cfg:
+			rd = round_cfg.get('l_semifinals')
+		elif rd_num == num_losers_rounds - 1 and 'l_finals' in round_cfg:
+			rd = round_cfg.get('l_finals')
+		else:
+			rd = round_cfg.get('default')
+		plan.append({'round_name': f"Losers {get_round_name(rd_num, num_losers_rounds)}", 'rd': rd,
+			'context': 'main', 'position': num_winners_rounds + rd_num})
+
+	# Generate winners rounds
+	# If 'share_rounds_w_l' setting is on, winners sets are copies of some losers rounds.
+	if round_cfg.get('share_rounds_w_l'):
+		for rd_num in range(1, num_winners_rounds):
+			losers_rd_num = 0 if rd_num == 1 else 2*(rd_num - 1) - 1
+			plan.append({'round_name': winners_name(rd_num), 'same_as': 1 + losers_rd_num, 'position': rd_num})
+	# If off, generate rounds as normal
+	else:
+		for rd_num in range(1, num_winners_rounds):
+			if rd_num == num_winners_rounds - 3 and 'w_quarterfinals' in round_cfg:
+				rd = round_cfg.get('w_quarterfinals')
+			elif rd_num == num_winners_rounds - 2 and 'w_semifinals' in round_cfg:
+				rd = round_cfg.get('w_semifinals')
+			elif rd_num == num_winners_rounds - 1 and 'w_finals' in round_cfg:
+				rd = round_cfg.get('w_finals')
+			else:
+				rd = round_cfg.get('default')
+			plan.append({'round_name': winners_name(rd_num), 'rd': rd, 'context': 'winners', 'position': rd_num})
+
+	num_rounds = num_winners_rounds + num_losers_rounds
+	plan.append({'round_name': "Grand Finals", 'rd': round_cfg.get('grand_finals') if 'grand_finals' in round_cfg
+		else round_cfg.get('default'), 'context': 'winners', 'position': num_rounds})
+	plan.append({'round_name': "Grand Finals Set 2 (If needed)", 'rd': round_cfg.get('grand_finals_reset') if 'grand_finals_reset' in round_cfg
+		else round_cfg.get('default'), 'context': 'winners', 'position': num_rounds + 1})
+	return plan
+
+
+def generate_independent_double_elim_rounds(compiled, plan, rng, solver=None, stage_format='structured', workers=1):
+	"""Output rounds of a double elimination plan whose losers and winners branches
+	   each get a seed of their own after winners round 1, so they can be
+	   generated in parallel. The output doesn't depend on workers.
+	"""
+	main_ctx = compiled.mapmode_pool.new_round_context()
+	wr1 = generate_round(plan[0]['rd'], compiled.mapmode_pool, main_ctx, rng, solver)
+	results = [None] * len(plan)
+	results[0] = (wr1, solver.get_relaxed_constraints(wr1) if solver else [])
+	branch_indices = {}
+	for i, step in enumerate(plan[1:], 1):
+		if 'same_as' not in step:
+			branch_indices.setdefault(step['context'], []).append(i)
+	branch_contexts = {'main': main_ctx, plan[0]['fork']: main_ctx.clone()}
+	branches = [([plan[i] for i in indices], branch_contexts[context], rng.getrandbits(64))
+		for context, indices in branch_indices.items()]
+	for indices, branch_results in zip(branch_indices.values(), generate_branches(compiled, branches, workers)):
+		for i, result in zip(indices, branch_results):
+			results[i] = result
+	for i, step in enumerate(plan):
+		if 'same_as' in step:
+			results[i] = results[step['same_as']]
+
+	output_rounds = [None] * len(plan)
+	for step, (round_list, relaxed) in zip(plan, results):
+		output_rounds[step['position']] = branch_round_to_dict(step['round_name'], round_list, relaxed, stage_format)
+	return output_rounds
+
+
+def generate_double_elim_tournament(compiled, rng, solver=None, stage_format='structured', workers=1):
+	plan = get_double_elim_plan(compiled)
+	if compiled.round_cfg.get('independent_branches'):
+		output_rounds = generate_independent_double_elim_rounds(compiled, plan, rng, solver, stage_format, workers)
+	else:
+		output_rounds = generate_planned_rounds(compiled, plan, rng, solver, stage_format)
+	output_dict = {
+		'tournament_type': 'double_elim',
+		'num_players': compiled.num_players,
+		'map_pool': compiled.used_map_pool,
+		'rounds': output_rounds
+	}
+	
+	return output_dict
+
+
+POD_TOURNAMENT_TYPES = ['swiss', 'round_robin']
+
+
+def get_number_pod_rounds(compiled):
+	"""Rounds each pod plays. A swiss stage defaults to enough rounds to leave one
+	   undefeated player, and in a round robin everyone plays everyone once.
+	"""
+	if compiled.tournament_type == 'round_robin':
+		return compiled.num_players - 1 if compiled.num_players % 2 == 0 else compiled.num_players
+	return compiled.num_rounds or get_number_winners_rounds(compiled.num_players)
+
+
+def get_pod_name(tournament_type, pod_num):
+	if tournament_type == 'round_robin':
+		return f"Group {chr(ord('A') + pod_num)}" if pod_num < 26 else f"Group {pod_num + 1}"
+	return f"Pod {pod_num + 1}"
+
+
+def get_pods_plan(compiled):
+	"""Every pod has its own game history. With share_rounds_across_pods, each
+	   round is generated once and played by every pod.
+	"""
+	round_cfg = compiled.round_cfg
+	num_rounds = get_number_pod_rounds(compiled)
+	rds = [round_cfg.get('final_round') if rd_num == num_rounds - 1 and 'final_round' in round_cfg
+		else round_cfg.get('default') for rd_num in range(num_rounds)]
+	if round_cfg.get('share_rounds_across_pods') or compiled.num_pods == 1:
+		return [{'round_name': f"Round {rd_num + 1}", 'rd': rd, 'context': 'main', 'position': rd_num}
+			for rd_num, rd in enumerate(rds)]
+	plan = []
+	for pod_num in range(compiled.num_pods):
+		pod_name = get_pod_name(compiled.tournament_type, pod_num)
+		for rd_num, rd in enumerate(rds):
+			plan.append({'round_name': f"{pod_name} Round {rd_num + 1}", 'rd': rd, 'context': pod_name, 'position': len(plan)})
+	return plan
+
+
+def generate_pods_tournament(compiled, rng, stage_format='structured', workers=1):
+	"""Generates each pod as a branch with its own RoundContext and a seed drawn
+	   from rng, so pods can be generated in parallel and the output doesn't
+	   depend on workers. workers=None uses one process per core.
+	"""
+	plan = get_pods_plan(compiled)
+	pod_plans = {}
+	for step in plan:
+		pod_plans.setdefault(step['context'], []).append(step)
+	pod_plans = list(pod_plans.values())
+	branches = [(pod_plan, compiled.mapmode_pool.new_round_context(), rng.getrandbits(64)) for pod_plan in pod_plans]
+
+	output_rounds = [None] * len(plan)
+	for pod_plan, pod_results in zip(pod_plans, generate_branches(compiled, branches, workers)):
+		for step, (round_list, relaxed) in zip(pod_plan, pod_results):
+			output_rounds[step['position']] = branch_round_to_dict(step['round_name'], round_list, relaxed, stage_format)
+	output_dict = {
+		'tournament_type': compiled.tournament_type,
+		'num_players': compiled.num_players,
+		'num_pods': compiled.num_pods,
+		'map_pool': compiled.used_map_pool,
+		'rounds': output_rounds
+	}
+
+	return output_dict
+
+
+def generate_branch(compiled, steps, round_ctx, seed):
+	"""Generates plan steps that all continue round_ctx, with an RNG of their own.
+
+	   Returns (games, relaxed rule names) for each step, which unlike a solver
+	   can be sent back from a worker process.
+	"""
+	rng = random.Random(seed)
+	solver = compiled.new_solver()
+	results = []
+	for step in steps:
+		round_list = generate_round(step['rd'], compiled.mapmode_pool, round_ctx, rng, solver)
+		results.append((round_list, solver.get_relaxed_constraints(round_list) if solver else []))
+	return results
+
+
+def _generate_branch_in_worker(steps, round_ctx, seed):
+	return generate_branch(_worker_compiled_tournament, steps, round_ctx, seed)
+
+
+def generate_branches(compiled, branches, workers=1):
+	"""generate_branch for each (steps, round_ctx, seed) of branches, spread over
+	   workers processes. workers=None uses one process per core.
+	"""
+	if workers == 1 or len(branches) <= 1:
+		return [generate_branch(compiled, *branch) for branch in branches]
+	from concurrent.futures import ProcessPoolExecutor
+	workers = min(workers or os.cpu_count() or 1, len(branches))
+	with ProcessPoolExecutor(max_workers=workers, initializer=_init_generate_worker,
+		initargs=(compiled,)) as executor:
+		return list(executor.map(_generate_branch_in_worker, *zip(*branches)))
+
+
+def branch_round_to_dict(rd_name, mapmode_list, relaxed, stage_format='structured'):
+	"""round_to_dict for a round from generate_branch."""
+	rd_dict = round_to_dict(rd_name, mapmode_list, None, stage_format)
+	if relaxed:
+		rd_dict['relaxed_constraints'] = relaxed
+	return rd_dict
+
+
+def create_tournament(mapmode_list, tournament_dict, rng=None, stage_format='structured', score_factors=None, workers=1):
+	"""Generates a tournament maplist. Pass a seeded random.Random as rng for a reproducible result."""
+	return CompiledTournament(mapmode_list, tournament_dict, score_factors).generate(rng, stage_format, workers)
+
+
+# Set in each worker process by generate_many and generate_pods_tournament, so the compiled tournament is sent once per worker
+_worker_compiled_tournament = None
+
+
+def _init_generate_worker(compiled):
+	global _worker_compiled_tournament
+	_worker_compiled_tournament = compiled
+
+
+def _generate_seeded(compiled, seed, stage_format='structured'):
+	return compiled.generate(random.Random(seed), stage_format)
+
+
+def _generate_in_worker(seed, stage_format):
+	return _generate_seeded(_worker_compiled_tournament, seed, stage_format)
+
+
+def derive_bracket_seeds(seed, n):
+	seed_rng = random.Random(seed)
+	return [seed_rng.getrandbits(64) for _ in range(n)]
+
+
+def generate_many(mapmode_list, tournament_dict, n, seed=None, workers=1, stage_format='structured'):
+	"""Generates n independent brackets from one tournament config.
+
+	   The config and map pool are compiled once. Each bracket gets its own seed
+	   derived from seed, so the output only depends on seed and n, not on how
+	   many worker processes are used. workers=None uses one process per core.
+	"""
+	compiled = CompiledTournament(mapmode_list, tournament_dict)
+	bracket_seeds = derive_bracket_seeds(seed, n)
+	if workers == 1:
+		return [_generate_seeded(compiled, bracket_seed, stage_format) for bracket_seed in bracket_seeds]
+	from concurrent.futures import ProcessPoolExecutor
+	workers = workers or os.cpu_count() or 1
+	chunksize = max(1, n // (4 * workers))
+	with ProcessPoolExecutor(max_workers=workers, initializer=_init_generate_worker,
+		initargs=(compiled,)) as executor:
+		return list(executor.map(_generate_in_worker, bracket_seeds, [stage_format] * n, chunksize=chunksize))
+
+
+def main(argv=None):
+	import json
+	parsed_args = build_parser().parse_args(argv)
+
+	print(f"Using tournament file {parsed_args.tournament_file}")
+	print(f"Using map pool file {parsed_args.map_pool_file}")
+	seed = parsed_args.seed if parsed_args.seed is not None else random.SystemRandom().getrandbits(32)
+	print(f"Using seed {seed}")
+
+	mapmode_list = read_map_pool_from_file(parsed_args.map_pool_file)
+	tournament_dict = read_tournament_from_file(parsed_args.tournament_file)
+	if parsed_args.engine:
+		tournament_dict.get('tournament_config', {})['engine'] = parsed_args.engine
+
+	stage_format = 'string' if parsed_args.legacy_stages else 'structured'
+
+	from .result_cache import get_cache_from_args
+	cache = get_cache_from_args(parsed_args)
+
+	history_store = None
+	score_factors = None
+	if parsed_args.series:
+		from .history_store import HistoryStore, get_tournament_score_factors
+		history_store = HistoryStore(parsed_args.history_db)
+	elif parsed_args.record:
+		raise RuntimeError('--record needs a --series to record to')
+
+	tracer = GenerationTracer(record_weights=bool(parsed_args.profile)) if parsed_args.profile is not None else None
+	if tracer and tournament_dict.get('tournament_config', {}).get('engine') == 'solver':
+		print("Warning: --profile only traces the greedy engine. The solver engine's picks don't go through the traced filter stages, so none will be listed.")
+	try:
+		if history_store:
+			score_factors = get_tournament_score_factors(history_store, parsed_args.series, mapmode_list, tournament_dict)
+		with trace_generation(tracer):
+			if parsed_args.candidates > 1:
+				from .bracket_search import search_best_tournament
+				output_json_dict, cost, bracket_seed = search_best_tournament(mapmode_list, tournament_dict,
+					parsed_args.candidates, seed, parsed_args.workers or None, stage_format=stage_format, score_factors=score_factors)
+				print(f"Best of {parsed_args.candidates} candidates has cost {cost:.4f}")
+			elif cache is not None and parsed_args.seed is not None and tracer is None and score_factors is None:
+				output_json_dict = cache.create_tournament(mapmode_list, tournament_dict, seed, stage_format, parsed_args.workers or None)
+			else:
+				# Picks made in worker processes can't be traced
+				workers = 1 if tracer else parsed_args.workers or None
+				output_json_dict = create_tournament(mapmode_list, tournament_dict, random.Random(seed), stage_format, score_factors, workers)
+		if history_store and parsed_args.record:
+			seq = history_store.record_tournament(parsed_args.series, output_json_dict,
+				os.path.basename(parsed_args.tournament_file), seed)
+			print(f"Recorded as event {seq} of series {parsed_args.series}")
+	finally:
+		if history_store:
+			history_store.close()
+	if tracer:
+		print(tracer.format_summary_table())
+		if parsed_args.profile:
+			with open(parsed_args.profile, "w+") as f:
+				tracer.write_json_lines(f)
+	if parsed_args.export:
+		from .export import export_tournament, get_export_name
+		for path in export_tournament(output_json_dict, parsed_args.export, get_export_name(parsed_args.tournament_file)):
+			print(f"Created {path}")
+	output_json_str = json.dumps(output_json_dict, indent=4)
+	if parsed_args.output_file:
+		print(parsed_args.output_file)
+		with open(parsed_args.output_file, "w+") as f:
+			f.write(output_json_str)
+	print(output_json_str)
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,119 @@
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+"""Opt-in tracing of the generation pipeline.
+
+   While a GenerationTracer is active (see trace_generation), every greedy pick
+   records how long each filter stage of MapModePool.filter_from_ctx took, the
+   pool size before and after it, how many of its constraints were skipped because
+   they would have emptied the pool, and the final weights random_choice used.
+   When no tracer is active the pipeline only pays for one attribute lookup per pick.
+"""
+
+# The tracer picks are recorded to, set by trace_generation. Shared by all threads.
+active_tracer = None
+
+
+@contextmanager
+def trace_generation(tracer):
+	"""Records every pick made inside the with block to tracer."""
+	global active_tracer
+	previous_tracer = active_tracer
+	active_tracer = tracer
+	try:
+		yield tracer
+	finally:
+		active_tracer = previous_tracer
+
+
+class GenerationTracer:
+	def __init__(self, record_weights=True):
+		self.record_weights = record_weights
+		self.picks = []
+		self._current_pick = None
+		self._last_checkpoint = 0.0
+
+	def begin_pick(self, round_ctx, pool_size):
+		self._current_pick = {
+			'pick': len(self.picks) + 1,
+			'round': round_ctx.num_past_rounds + 1,
+			'game': len(round_ctx.current_round) + 1,
+			'pool_size': pool_size,
+			'stages': {},
+		}
+		self.picks.append(self._current_pick)
+		self._last_checkpoint = time.perf_counter()
+
+	def record_step(self, stage, size_before, size_after, fallback):
+		"""Records one constraint of a stage. A stage made of several constraints is merged into one entry."""
+		now = time.perf_counter()
+		stages = self._current_pick['stages']
+		entry = stages.get(stage)
+		if entry is None:
+			entry = stages[stage] = {'seconds': 0.0, 'size_before': size_before, 'size_after': size_after, 'fallbacks': 0}
+		entry['seconds'] += now - self._last_checkpoint
+		entry['size_after'] = size_after
+		entry['fallbacks'] += 1 if fallback else 0
+		self._last_checkpoint = now
+
+	def end_pick(self, chosen_mapmode, weights=None):
+		if self._current_pick is None:
+			# random_choice called on a pool that wasn't filtered while tracing
+			return
+		self._current_pick['chosen'] = str(chosen_mapmode)
+		if weights is not None and self.record_weights:
+			self._current_pick['weights'] = weights
+		self._current_pick = None
+
+	def write_json_lines(self, f):
+		import json
+		for pick in self.picks:
+			f.write(json.dumps(pick) + "\n")
+
+	def get_summary(self):
+		"""stage -> totals over all picks, in the order stages were first seen."""
+		summary = defaultdict(lambda: {'calls': 0, 'seconds': 0.0, 'size_before': 0, 'size_after': 0, 'fallbacks': 0})
+		for pick in self.picks:
+			for stage, entry in pick['stages'].items():
+				totals = summary[stage]
+				totals['calls'] += 1
+				totals['seconds'] += entry['seconds']
+				totals['size_before'] += entry['size_before']
+				totals['size_after'] += entry['size_after']
+				totals['fallbacks'] += entry['fallbacks']
+		return dict(summary)
+
+	def format_summary_table(self):
+		lines = [f"{'stage':<24} {'calls':>7} {'total ms':>10} {'mean us':>9} {'avg before':>11} {'avg after':>10} {'fallbacks':>10}"]
+		for stage, totals in self.get_summary().items():
+			calls = totals['calls']
+			lines.append(f"{stage:<24} {calls:>7} {totals['seconds'] * 1000:>10.3f} {totals['seconds'] * 1e6 / calls:>9.1f} "
+				f"{totals['size_before'] / calls:>11.1f} {totals['size_after'] / calls:>10.1f} {totals['fallbacks']:>10}")
+		lines.append(f"{len(self.picks)} picks")
+		return "\n".join(lines)
+
+
+class FallbackCounter:
+	"""A tracer that only counts, per stage, the picks where a constraint of that stage was skipped.
+
+	   Much cheaper than GenerationTracer, for runs of many games.
+	"""
+	record_weights = False
+
+	def __init__(self):
+		self.num_picks = 0
+		self.fallbacks = defaultdict(int)
+		self._current_fallbacks = set()
+
+	def begin_pick(self, round_ctx, pool_size):
+		self._current_fallbacks.clear()
+
+	def record_step(self, stage, size_before, size_after, fallback):
+		if fallback:
+			self._current_fallbacks.add(stage)
+
+	def end_pick(self, mapmode, weights):
+		self.num_picks += 1
+		for stage in self._current_fallbacks:
+			self.fallbacks[stage] += 1
@@ -0,0 +1,28 @@
+from maplist_generator.analyze import get_exact_round_frequencies, simulate_rounds
+from maplist_generator.mapmode_pool import MapPoolConfig, to_mapmode_list
+
+# Small enough for the exact distribution to be quick, with non-preferred and
+# excluded maps so that every filter stage plays a part
+MAP_POOL = {
+	'modes': ['A', 'B', 'C'],
+	'maps': {
+		'A': [{'map_name': 'Map 1', 'score': 9}, {'map_name': 'Map 2', 'score': 7}, {'map_name': 'Map 3', 'score': 8.5}],
+		'B': [{'map_name': 'Map 1', 'score': 8}, {'map_name': 'Map 3', 'score': 10}, {'map_name': 'Map 4', 'score': 6.5}],
+		'C': [{'map_name': 'Map 2', 'score': 9.5}, {'map_name': 'Map 4', 'score': 8}, {'map_name': 'Map 5', 'score': 4}],
+	},
+}
+
+
+def test_exact_frequencies_match_simulation():
+	mapmode_list = to_mapmode_list(MAP_POOL)
+	map_pool_config = MapPoolConfig.from_dict({'min_games_before_repeat_mode': 1})
+	games_per_round = 3
+	for map_quality in [5, 8]:
+		frequencies = get_exact_round_frequencies(mapmode_list, map_pool_config, games_per_round, map_quality)
+		# One round per tournament, so every simulated round is a first round like the exact one
+		counts = simulate_rounds(mapmode_list, map_pool_config, 20000, games_per_round, map_quality, seed=1, tournament_rounds=1)
+		assert abs(sum(entry['frequency'] for entry in frequencies) - 1.0) < 1e-9
+		exact = {(entry['mode'], entry['map']): entry['frequency'] for entry in frequencies}
+		assert set(counts['mapmode_counts']) <= set(exact)
+		for key, frequency in exact.items():
+			assert abs(counts['mapmode_counts'][key] / counts['num_games'] - frequency) < 0.01
@@ -0,0 +1,50 @@
+import random
+from maplist_generator.bracket_search import BracketScorer, score_candidate, search_best_tournament
+from maplist_generator.mapmode_pool import to_mapmode_list
+from maplist_generator.tournament_gen import CompiledTournament
+from maplist_generator.tracing import FallbackCounter, trace_generation
+
+# B is only played on half the maps, so whether the second round can avoid the
+# maps of the first one depends on the picks
+MAP_POOL = {
+	'modes': ['A', 'B'],
+	'maps': {
+		'A': [{'map_name': f'Map {i}', 'score': 9} for i in range(1, 7)],
+		'B': [{'map_name': f'Map {i}', 'score': 9} for i in range(1, 4)],
+	},
+}
+TOURNAMENT = {
+	'tournament_type': 'rounds',
+	'tournament_config': {
+		'rounds': [{'num_games': 3}, {'num_games': 3}],
+		'min_games_before_repeat_mode': 1,
+	},
+}
+# Only the rules term, so the candidates differ in nothing else
+RULES_ONLY = {'mode_balance': 0.0, 'map_repetition': 0.0, 'average_score': 0.0}
+
+
+def get_fallbacks(compiled, seed):
+	counter = FallbackCounter()
+	with trace_generation(counter):
+		compiled.generate(random.Random(seed), 'mapmode')
+	return counter.fallbacks
+
+
+def test_candidate_with_fallback_scores_worse():
+	compiled = CompiledTournament(to_mapmode_list(MAP_POOL), TOURNAMENT)
+	scorer = BracketScorer(compiled, RULES_ONLY)
+	fallbacks = {seed: get_fallbacks(compiled, seed) for seed in range(50)}
+	clean_seed = next(seed for seed, stages in fallbacks.items() if not stages)
+	# A map of the previous round repeated, which the output of a single round doesn't show
+	seed = next(seed for seed, stages in fallbacks.items() if stages.get('previous_round_maps'))
+
+	assert score_candidate(compiled, scorer, clean_seed) == 0.0
+	assert score_candidate(compiled, scorer, seed) > score_candidate(compiled, scorer, clean_seed)
+
+
+def test_search_keeps_candidate_without_fallbacks():
+	mapmode_list = to_mapmode_list(MAP_POOL)
+	_, cost, bracket_seed = search_best_tournament(mapmode_list, TOURNAMENT, 50, seed=1, weights=RULES_ONLY)
+	assert cost == 0.0
+	assert not get_fallbacks(CompiledTournament(mapmode_list, TOURNAMENT), bracket_seed)
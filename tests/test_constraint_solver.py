@@ -0,0 +1,84 @@
+import random
+from collections import defaultdict
+from maplist_generator.constraint_solver import RELAXATION_ORDER
+from maplist_generator.mapmode_pool import MapPoolConfig, to_mapmode_list
+from maplist_generator.tournament_gen import create_tournament
+
+
+def create_solver_rounds(map_pool_dict, rounds, **params):
+	tournament_dict = {
+		'tournament_type': 'rounds',
+		'tournament_config': dict(rounds=rounds, engine='solver', **params),
+	}
+	return create_tournament(to_mapmode_list(map_pool_dict), tournament_dict, random.Random(1), 'mapmode')['rounds']
+
+
+def test_tight_pool_relaxes_only_needed_rule():
+	# Two maps can't fill a round of three games without repeating one
+	map_pool_dict = {'modes': ['A', 'B'], 'maps': {mode: [
+		{'map_name': 'Map 1', 'score': 9},
+		{'map_name': 'Map 2', 'score': 9},
+	] for mode in ['A', 'B']}}
+	rd, = create_solver_rounds(map_pool_dict, [{'num_games': 3}], min_games_before_repeat_mode=1)
+	assert rd['relaxed_constraints'] == ['distinct_maps_in_round']
+	maps = [stage.map_name for stage in rd['stages']]
+	assert len(set(maps)) < len(maps)
+	modes = [stage.mode_name for stage in rd['stages']]
+	assert all(mode != next_mode for mode, next_mode in zip(modes, modes[1:]))
+
+
+def test_relaxed_rules_follow_relaxation_order():
+	# One mode, so every game repeats it, and two maps for three games
+	map_pool_dict = {'modes': ['A'], 'maps': {'A': [
+		{'map_name': 'Map 1', 'score': 9},
+		{'map_name': 'Map 2', 'score': 9},
+	]}}
+	rd, = create_solver_rounds(map_pool_dict, [{'num_games': 3}], min_games_before_repeat_mode=1)
+	assert rd['relaxed_constraints'] == ['min_games_before_repeat_mode', 'distinct_maps_in_round']
+	assert rd['relaxed_constraints'] == [rule for rule in RELAXATION_ORDER if rule in rd['relaxed_constraints']]
+
+
+def check_rules(rounds, map_pool_dict, config):
+	"""Asserts that the games of a rounds tournament, in order, meet every rule of config."""
+	scores = {(mode, mapmode['map_name']): mapmode['score']
+		for mode, maps in map_pool_dict['maps'].items() for mapmode in maps}
+	recent_modes = []
+	previous_round_maps = set()
+	mode_maps = defaultdict(list)
+	for rd in rounds:
+		round_maps = set()
+		non_preferred = 0
+		for stage in rd['stages']:
+			mode, map_name = stage.mode_name, stage.map_name
+			score = scores[(mode, map_name)]
+			assert score >= config.exclude_map_score_threshold
+			if score < config.preferred_map_score_threshold:
+				non_preferred += 1
+			assert map_name not in round_maps
+			if config.distinct_maps_in_consecutive_rounds:
+				assert map_name not in previous_round_maps
+			if config.min_games_before_repeat_mode > 0:
+				assert mode not in recent_modes[-config.min_games_before_repeat_mode:]
+			if map_name not in mode_maps[mode]:
+				mode_maps[mode].append(map_name)
+			assert len(mode_maps[mode]) <= config.max_maps_per_mode
+			round_maps.add(map_name)
+			recent_modes.append(mode)
+		assert non_preferred <= config.max_non_preferred_maps_per_round
+		previous_round_maps = round_maps
+
+
+def test_feasible_pool_meets_every_rule():
+	# Mostly preferred maps, with a few non-preferred and bad ones
+	map_pool_dict = {'modes': ['A', 'B', 'C', 'D'], 'maps': {mode: [
+		{'map_name': f'Map {i}', 'score': [9, 8, 9, 7, 4][i % 5]} for i in range(24)
+	] for mode in ['A', 'B', 'C', 'D']}}
+	params = {
+		'min_games_before_repeat_mode': 2,
+		'max_non_preferred_maps_per_round': 1,
+		'max_maps_per_mode': 5,
+	}
+	rounds = create_solver_rounds(map_pool_dict, [{'num_games': n} for n in [3, 5, 3, 5, 7, 3]], **params)
+	assert not any('relaxed_constraints' in rd for rd in rounds)
+	check_rules(rounds, map_pool_dict, MapPoolConfig.from_dict(params))
+
@@ -0,0 +1,17 @@
+from maplist_generator.history_store import HistoryStore, get_score_factors
+
+
+def test_score_factors_are_relative_to_whole_pool():
+	decayed_games = {('A', 'Map 1'): 2.0, ('A', 'Map 2'): 2.0}
+	# Played equally often, so relative to each other they are at the average
+	assert get_score_factors(decayed_games, 0.5) == {('A', 'Map 1'): 1 / 1.5, ('A', 'Map 2'): 1 / 1.5}
+	# Half of the pool was never played, so the played mapmodes are at twice the average
+	pool_keys = [('A', 'Map 1'), ('A', 'Map 2'), ('B', 'Map 1'), ('B', 'Map 2')]
+	assert get_score_factors(decayed_games, 0.5, pool_keys) == {('A', 'Map 1'): 0.5, ('A', 'Map 2'): 0.5}
+
+
+def test_score_factors_skip_mapmodes_outside_pool():
+	with HistoryStore(':memory:') as store:
+		store.record_event('weekly', {('A', 'Map 1'): 1, ('A', 'Removed Map'): 3})
+		score_factors = store.get_score_factors('weekly', 0.5, [('A', 'Map 1'), ('A', 'Map 2')])
+	assert score_factors == {('A', 'Map 1'): 1 / 2.0}
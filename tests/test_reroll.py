@@ -0,0 +1,76 @@
+import json
+import random
+import pytest
+from maplist_generator.mapmode_pool import read_map_pool_from_file, read_tournament_from_file
+from maplist_generator.reroll import breaks_constraints, read_round_lists, replay_round, reroll_rounds
+from maplist_generator.tournament_gen import CompiledTournament, create_tournament
+
+MAP_POOL_FILE = 'examples/example_map_pool.json'
+DOUBLE_ELIM_TOURNAMENT_FILE = 'examples/double_elim_tournament.json'
+ROUNDS_TOURNAMENT = {'tournament_type': 'rounds', 'tournament_config': {'rounds': [{'num_games': 5}] * 6}}
+
+
+def test_unselected_rounds_are_unchanged():
+	mapmode_list = read_map_pool_from_file(MAP_POOL_FILE)
+	tournament_dict = read_tournament_from_file(DOUBLE_ELIM_TOURNAMENT_FILE)
+	output_dict = create_tournament(mapmode_list, tournament_dict, random.Random(1))
+	round_name = output_dict['rounds'][3]['round_name']
+	for seed in range(5):
+		new_output_dict, rerolled_names = reroll_rounds(mapmode_list, tournament_dict, output_dict, [round_name],
+			random.Random(seed))
+		assert rerolled_names == [round_name]
+		for old_rd, new_rd in zip(output_dict['rounds'], new_output_dict['rounds']):
+			if old_rd['round_name'] != round_name:
+				assert json.dumps(new_rd) == json.dumps(old_rd)
+
+
+def test_downstream_only_regenerates_rounds_breaking_rules():
+	mapmode_list = read_map_pool_from_file(MAP_POOL_FILE)
+	compiled = CompiledTournament(mapmode_list, ROUNDS_TOURNAMENT)
+	output_dict = create_tournament(mapmode_list, ROUNDS_TOURNAMENT, random.Random(1))
+	plan = compiled.get_plan()
+	old_round_lists = read_round_lists(compiled, plan, output_dict)
+	kept_later_rounds = 0
+	for seed in range(10):
+		new_output_dict, rerolled_names = reroll_rounds(mapmode_list, ROUNDS_TOURNAMENT, output_dict, ['Round 2'],
+			random.Random(seed), downstream=True)
+		new_round_lists = read_round_lists(compiled, plan, new_output_dict)
+		round_ctx = compiled.mapmode_pool.new_round_context()
+		for step, old_rd, new_rd, old_list, new_list in zip(plan, output_dict['rounds'], new_output_dict['rounds'],
+			old_round_lists, new_round_lists):
+			if step['round_name'] != 'Round 1' and step['round_name'] != 'Round 2':
+				# A later round is regenerated exactly when the new history rules out one of its games
+				breaks = breaks_constraints(step['rd'], old_list, compiled.mapmode_pool, round_ctx)
+				assert (step['round_name'] in rerolled_names) == breaks
+				if not breaks:
+					assert json.dumps(new_rd) == json.dumps(old_rd)
+					kept_later_rounds += 1
+			replay_round(step['rd'], new_list, round_ctx)
+	assert kept_later_rounds > 0
+
+
+def test_output_from_different_config_is_rejected():
+	mapmode_list = read_map_pool_from_file(MAP_POOL_FILE)
+	output_dict = create_tournament(mapmode_list, ROUNDS_TOURNAMENT, random.Random(1))
+	other_tournament = {'tournament_type': 'rounds', 'tournament_config': {'rounds': [{'num_games': 5}] * 4}}
+	compiled = CompiledTournament(mapmode_list, other_tournament)
+	with pytest.raises(RuntimeError):
+		read_round_lists(compiled, compiled.get_plan(), output_dict)
+	with pytest.raises(RuntimeError):
+		reroll_rounds(mapmode_list, other_tournament, output_dict, ['Round 2'])
+	with pytest.raises(RuntimeError):
+		reroll_rounds(mapmode_list, read_tournament_from_file(DOUBLE_ELIM_TOURNAMENT_FILE), output_dict, ['Round 2'])
+
+
+def test_reroll_uses_score_factors():
+	mapmode_list = read_map_pool_from_file(MAP_POOL_FILE)
+	score_factors = {mapmode.key: 0.3 for mapmode in mapmode_list[::3]}
+	for seed in range(3):
+		output_dict = create_tournament(mapmode_list, ROUNDS_TOURNAMENT, random.Random(seed), score_factors=score_factors)
+		round_names = [rd['round_name'] for rd in output_dict['rounds']]
+		# Rerolling every round with the seed and weights of the original run generates it again
+		new_output_dict, _ = reroll_rounds(mapmode_list, ROUNDS_TOURNAMENT, output_dict, round_names, random.Random(seed),
+			score_factors=score_factors)
+		assert new_output_dict == output_dict
+		new_output_dict, _ = reroll_rounds(mapmode_list, ROUNDS_TOURNAMENT, output_dict, round_names, random.Random(seed))
+		assert new_output_dict != output_dict
@@ -0,0 +1,58 @@
+import asyncio
+import json
+from maplist_generator.server import GenerationServer
+
+
+async def send_request(server, data):
+	"""Sends raw bytes to server over a local connection, returns (status line, response body)."""
+	tcp_server = await asyncio.start_server(server.handle_connection, '127.0.0.1', 0)
+	port = tcp_server.sockets[0].getsockname()[1]
+	async with tcp_server:
+		reader, writer = await asyncio.open_connection('127.0.0.1', port)
+		writer.write(data)
+		await writer.drain()
+		response = await reader.read()
+		writer.close()
+	head, _, body = response.partition(b'\r\n\r\n')
+	return head.split(b'\r\n')[0].decode('latin-1'), json.loads(body)
+
+
+def post_rpc(body):
+	server = GenerationServer(workers=1)
+	try:
+		return asyncio.run(send_request(server, (f"POST / HTTP/1.1\r\nContent-Length: {len(body)}\r\n"
+			"Connection: close\r\n\r\n").encode('latin-1') + body))
+	finally:
+		server.executor.shutdown()
+
+
+def test_parse_error():
+	status, response = post_rpc(b'{"jsonrpc": "2.0", "method": ')
+	assert status == 'HTTP/1.1 200 OK'
+	assert response['id'] is None
+	assert response['error']['code'] == -32700
+
+
+def test_unknown_method():
+	status, response = post_rpc(json.dumps({'jsonrpc': '2.0', 'id': 3, 'method': 'nope', 'params': {}}).encode('utf-8'))
+	assert status == 'HTTP/1.1 200 OK'
+	assert response['id'] == 3
+	assert response['error']['code'] == -32601
+
+
+def test_bad_params():
+	for params in [[1, 2], {'tournament_file': 'examples/example_tournament.json'}]:
+		status, response = post_rpc(json.dumps({'jsonrpc': '2.0', 'id': 4, 'method': 'create_tournament',
+			'params': params}).encode('utf-8'))
+		assert response['id'] == 4
+		assert response['error']['code'] == -32602
+
+
+def test_malformed_http_request():
+	server = GenerationServer(workers=1)
+	try:
+		for data in [b'NONSENSE\r\n\r\n', b'POST / HTTP/1.1\r\nContent-Length: many\r\n\r\n']:
+			status, response = asyncio.run(send_request(server, data))
+			assert status == 'HTTP/1.1 400 Bad Request'
+	finally:
+		server.executor.shutdown()